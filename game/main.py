@@ -1,8 +1,26 @@
 # program development started 6.10.2024. Elena Kržina
 # snake game with user input
 
-import snakevis as sv
+import os
+import sys
+
+# the game lives in the snakerl package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import argparse
+
+# usage: python game/main.py [--grid-size 35] [--cell-size 15] [--fps 5] [--food random|predefined]
 
 if __name__ == "__main__":
-    snake_game = sv.SnakeVisual()
-    snake_game.run_snake()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Play snake with the arrow keys")
+    parser.add_argument('--grid-size', type=int, default=35)
+    parser.add_argument('--cell-size', type=int, default=15)
+    parser.add_argument('--fps', type=int, default=5)
+    parser.add_argument('--food', choices=('random', 'predefined'), default='random')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    # pygame is loaded after the arguments are parsed, so --help and bad options return at once
+    from snakerl import human
+    from snakerl.food import make_food
+    human.run_game(args.grid_size, args.cell_size, args.fps, make_food(args.food), args.seed)
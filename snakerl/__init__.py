@@ -0,0 +1,7 @@
+# headless core only, the pygame frontends (viewer, human) are imported on demand
+from .env import SnakeEnv, Rewards
+from .food import RandomFood, ScheduledFood, make_food, generate_schedule, load_schedule, save_schedule
+from .vecenv import VecSnakeEnv
+from .features import StateExtractor
+from .agent import GameAgent, ExperienceReplayBuffer
+from .mlp import MLPAgent, QNetwork
@@ -0,0 +1,295 @@
+import time
+import numpy as np
+from . import qtable as qt
+from . import checkpoint as ckpt
+from .features import StateExtractor
+
+# visit counters are uint16 and stop at this value
+MAX_VISITS = 65535
+
+class ExperienceReplayBuffer:
+    def __init__(self, buffer_size, state_dtype=np.int64, rng=None):
+        # preallocated circular buffer, one typed column per field, states are Q-table indices
+        self.buffer_size = buffer_size
+        self.states = np.zeros(buffer_size, dtype=state_dtype)
+        self.actions = np.zeros(buffer_size, dtype=np.int8)
+        self.rewards = np.zeros(buffer_size, dtype=np.float32)
+        self.next_states = np.zeros(buffer_size, dtype=state_dtype)
+        self.dones = np.zeros(buffer_size, dtype=bool)
+        self.position = 0
+        self.size = 0
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def __len__(self):
+        return self.size
+
+    def add_experience(self, experience):
+        state, action, reward, next_state, done = experience
+        self.states[self.position] = state
+        self.actions[self.position] = action
+        self.rewards[self.position] = reward
+        self.next_states[self.position] = next_state
+        self.dones[self.position] = done
+        self.position = (self.position + 1) % self.buffer_size
+        self.size = min(self.size + 1, self.buffer_size)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        count = len(states)
+        if count > self.buffer_size:
+            # only the newest rows would survive anyway
+            states, actions, rewards, next_states, dones = (column[-self.buffer_size:] for column in (states, actions, rewards, next_states, dones))
+            count = self.buffer_size
+        rows = (self.position + np.arange(count)) % self.buffer_size
+        self.states[rows] = states
+        self.actions[rows] = actions
+        self.rewards[rows] = rewards
+        self.next_states[rows] = next_states
+        self.dones[rows] = dones
+        self.position = (self.position + count) % self.buffer_size
+        self.size = min(self.size + count, self.buffer_size)
+
+    def sample_batch(self, batch_size):
+        if self.size <= batch_size:
+            rows = np.arange(self.size)
+        else:
+            rows = self.rng.integers(0, self.size, size=batch_size)
+        return self.states[rows], self.actions[rows], self.rewards[rows], self.next_states[rows], self.dones[rows]
+
+    def nbytes(self):
+        return self.states.nbytes + self.actions.nbytes + self.rewards.nbytes + self.next_states.nbytes + self.dones.nbytes
+
+class GameAgent:
+    def __init__(self, state_size, action_size, alpha=0.1, gamma=0.9, epsilon=0.1, replay_buffer_size=1000, batch_size=32, q_backend='dense', q_dtype=np.float64, q_table=None, replay_buffer=None, seed=None,
+                 epsilon_schedule=None, learning_rate=None, count_visits=False, visits=None):
+            self.state_size = state_size
+            self.action_size = action_size
+            self.alpha = alpha
+            self.gamma = gamma 
+            self.epsilon = epsilon
+            # exploration and replay sampling draw from the agent's own generator
+            self.rng = np.random.default_rng(seed)
+            # states are read straight off the board as a single mixed radix key into the Q-table
+            self.features = StateExtractor(state_size[2])
+            if self.features.state_size != tuple(state_size):
+                raise ValueError(f"state_size {tuple(state_size)} does not match the grid, expected {self.features.state_size}")
+            self.encoder = self.features.encoder
+            if q_table is None:
+                q_table = qt.make_q_table(q_backend, self.encoder.num_states, action_size, q_dtype)
+            self.q_table = q_table
+            self.actions = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+            if replay_buffer is None:
+                state_dtype = np.int32 if self.encoder.num_states < 2 ** 31 else np.int64
+                replay_buffer = ExperienceReplayBuffer(replay_buffer_size, state_dtype, self.rng)
+            self.replay_buffer = replay_buffer
+            self.batch_size = batch_size
+            # learn from a minibatch every update_every env steps
+            self.update_every = 1
+            self.episodes_trained = 0
+            self.steps_trained = 0
+            # epsilon_schedule sets epsilon at the start of every episode, learning_rate replaces the
+            # constant alpha (see schedules.py), a VisitRate needs the per state-action update counts
+            self.epsilon_schedule = epsilon_schedule
+            self.learning_rate = learning_rate
+            if visits is None and (count_visits or getattr(learning_rate, 'uses_visits', False)):
+                visits = qt.make_q_table(qt.backend_of(self.q_table), self.encoder.num_states, action_size, np.uint16)
+            self.visits = visits
+
+    def get_state(self, game):
+        return self.features.index(game.occupancy, game.snake[0], game.food_position)
+
+    def get_states(self, games):
+        # one key per game, for stepping several SnakeEnvs in lockstep
+        occupancy = np.array([np.frombuffer(game.occupancy, dtype=np.uint8) for game in games])
+        heads = [game.snake[0] for game in games]
+        foods = [game.food_position if game.food_position is not None else (-1, -1) for game in games]
+        return self.features.index_batch(occupancy, heads, foods)
+
+    def choose_action(self, state):
+        # if smaller than epsilon, explore (random), otherwise exploit
+        if self.rng.random() < self.epsilon:
+            action = int(self.rng.integers(self.action_size))
+            return action
+        return np.argmax(self.q_table.get(state))
+
+    def choose_actions(self, states):
+        # epsilon-greedy for a batch of states, one row per game
+        greedy = np.argmax(self.q_table.get_batch(states), axis=1)
+        explore = self.rng.random(len(states)) < self.epsilon
+        random_actions = self.rng.integers(self.action_size, size=len(states))
+        return np.where(explore, random_actions, greedy)
+
+    def update_q_network(self, batch):
+        states, actions, rewards, next_states, dones = batch
+        if len(states) == 0:
+            return
+        self.update_q_batch(states, actions, rewards, next_states)
+
+    def update_q_batch(self, states, actions, rewards, next_states):
+        # all TD targets come from one gather over the table as it was before the batch
+        keys = states.astype(np.int64)
+        actions = actions.astype(np.intp)
+        rows = np.arange(len(keys))
+        next_q = self.q_table.get_batch(next_states)
+        best_next_actions = np.argmax(next_q, axis=1)
+        td_target = rewards + self.gamma * next_q[rows, best_next_actions]
+        td_error = td_target - self.q_table.get_batch(keys)[rows, actions]
+        # a state-action pair that repeats in the batch gets one merged update, the mean TD error
+        # at rate 1 - (1 - alpha)^count, which is what applying the repeats one by one converges to;
+        # summing them instead overshoots once count * alpha > 1 and diverges on large batches
+        pairs = keys * self.action_size + actions
+        unique_pairs, inverse, counts = np.unique(pairs, return_inverse=True, return_counts=True)
+        td_sum = np.bincount(inverse, weights=td_error, minlength=len(unique_pairs))
+        pair_keys, pair_actions = unique_pairs // self.action_size, unique_pairs % self.action_size
+        if self.visits is not None:
+            seen = self.visits.get_batch(pair_keys)[np.arange(len(pair_keys)), pair_actions].astype(np.int64)
+            self.visits.add_batch(pair_keys, pair_actions, np.minimum(counts, MAX_VISITS - seen).astype(np.uint16))
+        if self.learning_rate is None:
+            step = 1 - (1 - self.alpha) ** counts
+        else:
+            step = self.learning_rate.step(seen if self.visits is not None else 0, counts)
+        self.q_table.add_batch(pair_keys, pair_actions, step * td_sum / counts)
+
+    def save_checkpoint(self, path, game=None):
+        # with the game and the replay buffer saved too, a resumed run continues like an uninterrupted one
+        meta = {
+            'state_size': list(self.state_size), 'action_size': self.action_size,
+            'alpha': self.alpha, 'gamma': self.gamma, 'epsilon': self.epsilon,
+            'batch_size': self.batch_size, 'episodes_trained': self.episodes_trained, 'steps_trained': self.steps_trained,
+        }
+        rng_state = {'agent': self.rng.bit_generator.state}
+        if game is not None:
+            rng_state['env'] = game.get_rng_state()
+        replay_buffer = self.replay_buffer if isinstance(self.replay_buffer, ExperienceReplayBuffer) else None
+        ckpt.save_checkpoint(path, self.q_table, meta, rng_state, self.visits, replay_buffer)
+
+    @classmethod
+    def from_checkpoint(cls, path, mmap_mode=None, restore_rng=True, **kwargs):
+        # schedules are not stored, pass epsilon_schedule and learning_rate again to keep using them.
+        # restore_rng=False skips the generator states and the replay buffer, for playing or serving the table
+        q_table, meta, rng_state = ckpt.load_checkpoint(path, mmap_mode)
+        visits = ckpt.load_visits(path, meta, mmap_mode)
+        agent = cls(tuple(meta['state_size']), meta['action_size'], alpha=meta['alpha'], gamma=meta['gamma'], epsilon=meta['epsilon'], batch_size=meta['batch_size'], q_table=q_table, visits=visits, **kwargs)
+        agent.episodes_trained = meta['episodes_trained']
+        agent.steps_trained = meta.get('steps_trained', 0)
+        if restore_rng and 'agent' in rng_state:
+            agent.rng.bit_generator.state = rng_state['agent']
+        if restore_rng and isinstance(agent.replay_buffer, ExperienceReplayBuffer):
+            ckpt.load_replay(path, agent.replay_buffer)
+        return agent
+
+    def q_table_report(self):
+        visited = self.q_table.occupancy()
+        report = f"Q-table: {type(self.q_table).__name__}, {self.q_table.nbytes() / 1e6:.1f} MB, {visited}/{self.encoder.num_states} states visited ({100 * visited / self.encoder.num_states:.3f}%)"
+        if self.visits is not None:
+            stats = self.visit_stats()
+            report += (f"\nVisits: {stats['pairs_visited']}/{stats['pairs']} state-actions updated ({100 * stats['pair_coverage']:.3f}%), "
+                       f"{stats['updates']} updates, median {stats['median_visits']:.0f}, max {stats['max_visits']}, "
+                       f"histogram {stats['histogram']}, {self.visits.nbytes() / 1e6:.1f} MB of counters")
+        return report
+
+    def visit_stats(self):
+        # how much of the table training touches, from the per state-action update counters
+        rows = self.visits.values if isinstance(self.visits, qt.DenseQTable) else self.visits.items()[1]
+        rows = rows[rows.any(axis=1)]
+        counts = rows[rows > 0].astype(np.int64)
+        pairs = self.encoder.num_states * self.action_size
+        edges = [1, 2, 10, 100, 1000, 10000, MAX_VISITS + 1]
+        histogram = np.histogram(counts, bins=edges)[0] if len(counts) > 0 else np.zeros(len(edges) - 1, dtype=np.int64)
+        return {
+            'states_visited': len(rows),
+            'pairs_visited': len(counts),
+            'pairs': pairs,
+            'state_coverage': len(rows) / self.encoder.num_states,
+            'pair_coverage': len(counts) / pairs,
+            'updates': int(counts.sum()),
+            'mean_visits': float(counts.mean()) if len(counts) > 0 else 0.0,
+            'median_visits': float(np.median(counts)) if len(counts) > 0 else 0.0,
+            'max_visits': int(counts.max()) if len(counts) > 0 else 0,
+            'saturated': int(np.count_nonzero(counts == MAX_VISITS)),
+            'histogram': {f"{low}-{high - 1}" if high - low > 1 else str(low): int(n) for low, high, n in zip(edges[:-1], edges[1:], histogram)},
+        }
+
+    def train(self, game, episodes, viewer=None, learn=True, checkpoint_dir=None, checkpoint_interval=500, metrics=None, recorder=None):
+        # with metrics set every phase of a step is timed, without it the loop pays one branch per phase
+        timed = metrics is not None
+        for episode in range(episodes):
+            if self.epsilon_schedule is not None:
+                self.epsilon = self.epsilon_schedule.value(self.episodes_trained)
+            state = self.get_state(game)
+            total_reward = 0
+            steps = 0
+            score = 0
+            game.running = True
+            if recorder is not None:
+                recorder.start_episode(game)
+            while game.running:
+                if viewer is not None and not viewer.handle_events():
+                    viewer.close()
+                    return
+
+                if timed:
+                    t = time.perf_counter()
+                action = self.choose_action(state)
+                direction = self.actions[action]
+                if timed:
+                    t = metrics.lap('action', t)
+                reward = game.move_snake(direction)
+                if timed:
+                    t = metrics.lap('env_step', t)
+                next_state = self.get_state(game)
+                if timed:
+                    t = metrics.lap('state', t)
+                self.replay_buffer.add_experience((state, action, reward, next_state, not game.running))
+                if timed:
+                    t = metrics.lap('buffer_add', t)
+                if recorder is not None:
+                    recorder.record_step(action, reward, game, not game.running)
+                state = next_state
+                total_reward += reward
+                steps += 1
+                self.steps_trained += 1
+                if game.running:
+                    score = game.score
+
+                # sample mini-batch from replay buffer, actors that only collect experience skip this
+                if learn and self.steps_trained % self.update_every == 0:
+                    batch = self.replay_buffer.sample_batch(self.batch_size)
+                    if timed:
+                        t = metrics.lap('sample', t)
+                    self.update_q_network(batch)
+                    if timed:
+                        t = metrics.lap('update', t)
+
+                if viewer is not None:
+                    viewer.render()
+                    if timed:
+                        metrics.lap('render', t)
+
+            self.episodes_trained += 1
+            if recorder is not None:
+                recorder.end_episode()
+            if timed:
+                metrics.end_episode(steps, score, total_reward, self.epsilon)
+            if checkpoint_dir is not None and self.episodes_trained % checkpoint_interval == 0:
+                self.save_checkpoint(checkpoint_dir, game)
+
+    def train_vectorized(self, venv, steps):
+        # steps of all the games at once, learning every update_every of them. Returns the episodes finished
+        states = venv.get_states()
+        episodes = 0
+        for step in range(steps):
+            if self.epsilon_schedule is not None:
+                self.epsilon = self.epsilon_schedule.value(self.episodes_trained)
+            actions = self.choose_actions(states)
+            next_states, rewards, dones = venv.step(actions)
+            self.replay_buffer.add_batch(states, actions, rewards, next_states, dones)
+            states = next_states
+            finished = int(dones.sum())
+            episodes += finished
+            self.episodes_trained += finished
+            self.steps_trained += venv.num_envs
+
+            if (step + 1) % self.update_every == 0:
+                batch = self.replay_buffer.sample_batch(self.batch_size)
+                self.update_q_network(batch)
+        return episodes
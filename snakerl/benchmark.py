@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+from .env import SnakeEnv
+from .food import make_food
+from .vecenv import VecSnakeEnv
+from .agent import GameAgent
+from .features import state_size_for
+
+# usage: python -m snakerl.benchmark [--quick] [--output results.json] [--baseline benchmarks/reference.json] [--save-baseline]
+# benchmarks/ holds committed baselines, one JSON per machine; reference.json is the training machine
+# and the default. Record another with --baseline benchmarks/<machine>.json --save-baseline
+
+GRID_SIZES = (10, 35, 64)
+FOOD_MODES = ('random', 'predefined')
+ACTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+# metrics where a larger value is better, every other metric regresses when it grows
+THROUGHPUT_METRICS = ('env_steps_per_sec', 'vec_env_steps_per_sec', 'q_updates_per_sec')
+
+def make_env(grid_size, food_mode, seed=0):
+    return SnakeEnv(grid_size=grid_size, food=make_food(food_mode), seed=seed)
+
+def make_agent(grid_size, replay_buffer_size=100000, seed=0):
+    state_size = state_size_for(grid_size)
+    # the dense table only fits in memory for the small board
+    q_backend = 'dense' if grid_size <= 10 else 'hash'
+    return GameAgent(state_size, 4, replay_buffer_size=replay_buffer_size, q_backend=q_backend, seed=seed)
+
+def best_time(fn, repeats=5):
+    # the fastest of several runs is the least disturbed by other load on the machine
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_scenario(grid_size, food_mode, scale):
+    rng = np.random.default_rng(0)
+    results = {}
+
+    # peak memory covers the env, the agent, a filled replay buffer and a first round of updates
+    tracemalloc.start()
+    env = make_env(grid_size, food_mode)
+    agent = make_agent(grid_size)
+    steps = int(20000 * scale)
+    actions = [ACTIONS[action] for action in rng.integers(4, size=steps)]
+    state = agent.get_state(env)
+    for direction in actions[:int(10000 * scale)]:
+        reward = env.move_snake(direction)
+        next_state = agent.get_state(env)
+        agent.replay_buffer.add_experience((state, ACTIONS.index(direction), reward, next_state, not env.running))
+        state = next_state
+    for _ in range(200):
+        agent.update_q_network(agent.replay_buffer.sample_batch(agent.batch_size))
+    results['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+
+    def step_env():
+        for direction in actions:
+            env.move_snake(direction)
+    results['env_steps_per_sec'] = steps / best_time(step_env)
+
+    calls = int(20000 * scale)
+    def get_states():
+        for _ in range(calls):
+            agent.get_state(env)
+    results['get_state_us'] = best_time(get_states) / calls * 1e6
+
+    samples = int(5000 * scale)
+    def sample_batches():
+        for _ in range(samples):
+            agent.replay_buffer.sample_batch(agent.batch_size)
+    results['sample_batch_us'] = best_time(sample_batches) / samples * 1e6
+
+    batches = [agent.replay_buffer.sample_batch(agent.batch_size) for _ in range(int(2000 * scale))]
+    def update():
+        for batch in batches:
+            agent.update_q_network(batch)
+    results['q_updates_per_sec'] = len(batches) * agent.batch_size / best_time(update)
+
+    if food_mode == 'random':
+        venv = VecSnakeEnv(256, grid_size=grid_size, seed=0)
+        vec_steps = max(int(200 * scale), 1)
+        vec_actions = rng.integers(4, size=(vec_steps, venv.num_envs))
+        def step_vec_env():
+            for step_actions in vec_actions:
+                venv.step(step_actions)
+        results['vec_env_steps_per_sec'] = vec_steps * venv.num_envs / best_time(step_vec_env)
+    return results
+
+def run_benchmarks(scale=1.0, grid_sizes=GRID_SIZES, food_modes=FOOD_MODES):
+    scenarios = {}
+    for grid_size in grid_sizes:
+        for food_mode in food_modes:
+            scenarios[f"grid{grid_size}-{food_mode}"] = run_scenario(grid_size, food_mode, scale)
+    return {
+        'machine': {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'scale': scale,
+        'scenarios': scenarios,
+    }
+
+def best_of(runs):
+    # per metric the best value over whole repeated runs, on a shared machine single runs vary too
+    # much for a regression check
+    best = runs[0]
+    for run in runs[1:]:
+        for name, metrics in run['scenarios'].items():
+            for metric, value in metrics.items():
+                pick = max if metric in THROUGHPUT_METRICS else min
+                best['scenarios'][name][metric] = pick(best['scenarios'][name][metric], value)
+    best['runs'] = len(runs)
+    return best
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, metrics in results['scenarios'].items():
+        for metric, value in metrics.items():
+            expected = baseline.get('scenarios', {}).get(name, {}).get(metric)
+            if expected is None:
+                continue
+            if metric in THROUGHPUT_METRICS:
+                regressed = value < expected * (1 - tolerance)
+            else:
+                regressed = value > expected * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{name} {metric}: {value:.2f} (baseline {expected:.2f})")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Training throughput benchmarks")
+    parser.add_argument('--quick', action='store_true', help="run a tenth of the iterations")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'reference.json'),
+                        help="baseline results to compare against")
+    parser.add_argument('--runs', type=int, default=3, help="repeat the benchmarks and keep the best value of each metric")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument('--save-baseline', action='store_true', help="overwrite the baseline with these results")
+    args = parser.parse_args()
+
+    results = best_of([run_benchmarks(scale=0.1 if args.quick else 1.0) for _ in range(args.runs)])
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(report + '\n')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('machine') != results['machine']:
+            print(f"Baseline was recorded on a different machine: {baseline.get('machine')}")
+        if baseline.get('scale') != results['scale']:
+            print(f"Baseline was recorded with scale {baseline.get('scale')}, not comparing")
+        else:
+            regressions = compare(results, baseline, args.tolerance)
+            for regression in regressions:
+                print(f"Regression: {regression}")
+            if regressions:
+                sys.exit(1)
+            print("No regressions against the baseline")
+    else:
+        print(f"No baseline at {args.baseline}, record one on the target machine with --save-baseline")
@@ -0,0 +1,142 @@
+import os
+import json
+import numpy as np
+from . import qtable as qt
+
+# a checkpoint is a directory holding the Q-table, meta.json, replay.npz and rng.json (generator states
+# of the agent and env as plain JSON, so loading a checkpoint never unpickles anything).
+# meta.json is replaced last and names the dense table file to read, so an interrupted save leaves
+# the previous table intact
+
+def write_atomic(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def table_file(path, name):
+    # the file the checkpoint in path currently points at, None without a checkpoint there.
+    # checkpoints from before the alternating files always used name.npy
+    meta_file = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_file):
+        return None
+    with open(meta_file) as f:
+        meta = json.load(f)
+    return meta.get('files', {}).get(name, name + '.npy')
+
+def save_dense(q_table, path, name='q_table'):
+    # dense tables alternate between two files and meta.json names the current one, so the file a
+    # reader has memory-mapped is not written until the save after next. The target only needs the
+    # blocks changed since it was last written, which this table knows if it made or loaded the
+    # previous save in this directory; anything else gets a full write. Returns the file written
+    live = table_file(path, name)
+    target = name + '.1.npy' if live == name + '.npy' else name + '.npy'
+    file = os.path.join(path, target)
+    values = q_table.values
+    continuing = live is not None and q_table.saved_path == os.path.join(path, live)
+    existing = None
+    if continuing and q_table.previous_dirty is not None and os.path.exists(file):
+        existing = np.load(file, mmap_mode='r+')
+        if existing.shape != values.shape or existing.dtype != values.dtype:
+            existing = None
+    if existing is None:
+        existing = np.lib.format.open_memmap(file + '.tmp', mode='w+', dtype=values.dtype, shape=values.shape)
+        existing[...] = values
+        existing.flush()
+        del existing
+        os.replace(file + '.tmp', file)
+    else:
+        for block in np.flatnonzero(q_table.dirty_blocks | q_table.previous_dirty):
+            start = block * q_table.block_size
+            end = start + q_table.block_size
+            existing[start:end] = values[start:end]
+        existing.flush()
+        del existing
+    # the file just left holds the previous save, it lags by what changed since then
+    q_table.previous_dirty = q_table.dirty_blocks.copy() if continuing else None
+    q_table.saved_path = file
+    q_table.dirty_blocks[:] = False
+    return target
+
+def save_table(q_table, path, name):
+    if isinstance(q_table, qt.DenseQTable):
+        return save_dense(q_table, path, name)
+    keys, values = q_table.items()
+    np.savez(os.path.join(path, name + '.tmp.npz'), keys=keys, values=values)
+    os.replace(os.path.join(path, name + '.tmp.npz'), os.path.join(path, name + '.npz'))
+    return name + '.npz'
+
+def save_checkpoint(path, q_table, meta, rng_state, visits=None, replay_buffer=None):
+    # visits is the agent's visit counter table, stored next to the Q-table with the same backend
+    os.makedirs(path, exist_ok=True)
+    if replay_buffer is not None:
+        save_replay(path, replay_buffer)
+    meta = dict(meta, backend=qt.backend_of(q_table), visits=visits is not None)
+    meta['files'] = {'q_table': save_table(q_table, path, 'q_table')}
+    if visits is not None:
+        meta['files']['visits'] = save_table(visits, path, 'visits')
+    meta['dtype'] = np.dtype(q_table.dtype).name
+    save_rng_state(path, rng_state)
+    write_atomic(os.path.join(path, 'meta.json'), json.dumps(meta, indent=2).encode())
+
+def save_rng_state(path, rng_state):
+    # {'agent': Generator.bit_generator.state, ...}, dicts of ints and strings
+    write_atomic(os.path.join(path, 'rng.json'), json.dumps(rng_state).encode())
+
+def load_rng_state(path):
+    # checkpoints from before rng.json kept a pickle, which is not read: those resume with fresh streams
+    file = os.path.join(path, 'rng.json')
+    if not os.path.exists(file):
+        return {}
+    with open(file) as f:
+        return json.load(f)
+
+def save_replay(path, replay_buffer):
+    columns = {field: getattr(replay_buffer, field) for field in ('states', 'actions', 'rewards', 'next_states', 'dones')}
+    np.savez(os.path.join(path, 'replay.tmp.npz'), position=replay_buffer.position, size=replay_buffer.size, **columns)
+    os.replace(os.path.join(path, 'replay.tmp.npz'), os.path.join(path, 'replay.npz'))
+
+def load_replay(path, replay_buffer):
+    # a buffer of the saved size gets the exact rows and write position back, so sampling continues as
+    # if never stopped; any other size takes the newest rows in order
+    file = os.path.join(path, 'replay.npz')
+    if not os.path.exists(file):
+        return
+    with np.load(file) as data:
+        position, size = int(data['position']), int(data['size'])
+        columns = [data[field] for field in ('states', 'actions', 'rewards', 'next_states', 'dones')]
+    if len(columns[0]) == replay_buffer.buffer_size:
+        for field, column in zip(('states', 'actions', 'rewards', 'next_states', 'dones'), columns):
+            getattr(replay_buffer, field)[...] = column
+        replay_buffer.position, replay_buffer.size = position, size
+    else:
+        rows = (position - size + np.arange(size)) % len(columns[0])
+        replay_buffer.add_batch(*(column[rows] for column in columns))
+
+def load_checkpoint(path, mmap_mode=None):
+    # with mmap_mode the dense table is paged in on demand and shared between processes
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    rng_state = load_rng_state(path)
+    q_table = load_table(path, 'q_table', meta, np.dtype(meta['dtype']), mmap_mode)
+    return q_table, meta, rng_state
+
+def load_table(path, name, meta, dtype, mmap_mode=None):
+    num_states = qt.StateEncoder(meta['state_size']).num_states
+    if meta['backend'] == 'dense':
+        file = os.path.join(path, meta.get('files', {}).get(name, name + '.npy'))
+        values = np.load(file, mmap_mode=mmap_mode)
+        q_table = qt.DenseQTable(num_states, meta['action_size'], dtype, values)
+        q_table.dirty_blocks[:] = False
+        q_table.saved_path = file
+    else:
+        q_table = qt.make_q_table(meta['backend'], num_states, meta['action_size'], dtype)
+        with np.load(os.path.join(path, name + '.npz')) as data:
+            q_table.load_items(data['keys'], data['values'])
+    return q_table
+
+def load_visits(path, meta, mmap_mode=None):
+    # None for checkpoints saved without visit counts
+    if not meta.get('visits'):
+        return None
+    return load_table(path, 'visits', meta, np.dtype(np.uint16), mmap_mode)
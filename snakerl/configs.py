@@ -0,0 +1,93 @@
+from .env import Rewards
+from .schedules import LinearSchedule
+
+# one entry per training setup, snakerl.train.main(name, **overrides) runs it
+CONFIGS = {
+    # random food, the original reinforcement-learning setup
+    'random': {
+        'grid_size': 10,
+        'food': 'random',
+        'rewards': Rewards(food=100, death=-50, step=1),
+        'alpha': 0.15,
+        'gamma': 0.8,
+        'epsilon': 0.2,
+        'episodes': 5000,
+    },
+    # the same 51 food cells every game, the reinforcement-learning-predefined-food setup
+    'predefined': {
+        'grid_size': 10,
+        'food': 'predefined',
+        'rewards': Rewards(food=50, death=-50, step=1),
+        'alpha': 0.08,
+        'gamma': 0.8,
+        'epsilon': 0.3,
+        'episodes': 1000,
+        # the curriculum is generated from this seed unless a schedule file (.npy or "x,y" lines) is given
+        'schedule_seed': 967,
+        'schedule_path': None,
+    },
+    # random food on the full 35x35 board with the Q-network agent, its size does not grow with the board
+    'mlp': {
+        'grid_size': 35,
+        'food': 'random',
+        'rewards': Rewards(food=100, death=-50, step=1),
+        'agent': 'mlp',
+        'alpha': 0.001,
+        'gamma': 0.9,
+        'epsilon': 0.01,
+        'epsilon_schedule': LinearSchedule(1.0, 0.01, 500),
+        'episodes': 1000,
+    },
+}
+
+# shared by every config unless overridden
+DEFAULTS = {
+    'cell_size': 20,
+    # set to True to watch training in a pygame window (caps training at the viewer fps)
+    'render': False,
+    # 'tabular' is GameAgent, 'mlp' is the Q-network MLPAgent (single process only)
+    'agent': 'tabular',
+    # 'mlp' only: hidden layer sizes, () for a linear Q-function
+    'hidden': (64, 64),
+    # 'dense' keeps the full table (q_table.npy), 'sparse' or 'hash' only store visited states
+    'q_backend': 'dense',
+    # e.g. schedules.LinearSchedule(0.3, 0.01, 4000) to decay exploration, None keeps epsilon fixed
+    'epsilon_schedule': None,
+    # e.g. schedules.VisitRate() for per state-action rates from visit counts, None keeps alpha fixed
+    'learning_rate': None,
+    # keep per state-action update counts (implied by a VisitRate) and report table coverage
+    'count_visits': False,
+    # more than one worker trains in separate processes sharing one Q-table
+    'workers': 1,
+    # how workers train: 'hogwild' all update the shared table, 'learner' adds a process training on
+    # their shared replay buffer, 'async' streams transitions to one learner through a bounded queue
+    'parallel_mode': 'hogwild',
+    # 'async' only: replay rows sampled per new transition, learner updates between policy snapshots
+    # the actors act with, and how many updates old a snapshot may be before its data is dropped
+    'update_to_data': 4.0,
+    'publish_interval': 10,
+    'max_staleness': None,
+    # progress is checkpointed to checkpoints/<config> every 500 episodes and resumed from on the next run
+    'checkpoint_dir': None,
+    # episodes per summary line, set metrics_path to a .jsonl or .csv file to keep every summary
+    'metrics_interval': 100,
+    'metrics_path': None,
+    # set to a file name to log every episode for replay with snakerl.recorder
+    'record_path': None,
+    # the env and agent get independent streams derived from this seed
+    'seed': 0,
+    'schedule_seed': 967,
+    'schedule_path': None,
+}
+
+def get_config(name, **overrides):
+    if name not in CONFIGS:
+        raise ValueError(f"Unknown config: {name}")
+    config = dict(DEFAULTS, **CONFIGS[name])
+    config.update(overrides)
+    config['name'] = name
+    if config['checkpoint_dir'] is None:
+        # a different board needs a table of a different size, so it gets its own checkpoint
+        suffix = f"_{config['grid_size']}" if config['grid_size'] != CONFIGS[name]['grid_size'] else ''
+        config['checkpoint_dir'] = f"checkpoints/{name}{suffix}"
+    return config
@@ -0,0 +1,130 @@
+import numpy as np
+from collections import deque, namedtuple
+from .food import RandomFood
+
+Rewards = namedtuple('Rewards', 'food death step', defaults=(100, -50, 1))
+
+class SnakeEnv:
+    def __init__(self, grid_size=35, food=None, rewards=None, seed=None, initial_snake=((5, 5), (4, 5), (3, 5))):
+        self.grid_size = grid_size
+        # food placement draws only from this generator, so a seed fixes the whole food sequence
+        self.rng = np.random.default_rng(seed)
+        self.food = food if food is not None else RandomFood()
+        self.rewards = rewards if rewards is not None else Rewards()
+        self.initial_snake = tuple(initial_snake)
+        self.food_position = None
+        self.food_eaten = False
+        self.current_direction = 'RIGHT'
+        self.score = 0
+        self.running = True
+        # 'wall' or 'body' for the collision that ended the last game
+        self.death_cause = None
+
+        # occupancy bitmap indexed by x * grid_size + y, plus the free interior
+        # cells with each cell's slot in that list so both can be updated in O(1)
+        self.occupancy = bytearray(grid_size * grid_size)
+        self.free_cells = [(x, y) for x in range(1, grid_size - 1) for y in range(1, grid_size - 1)]
+        self.free_slot = [-1] * (grid_size * grid_size)
+        for slot, (x, y) in enumerate(self.free_cells):
+            self.free_slot[x * grid_size + y] = slot
+
+        self.snake = deque()
+        self.reset_snake()
+        self.food.reset(self)
+        self.generate_food()
+
+    def reset_snake(self):
+        for segment in self.snake:
+            self.vacate_cell(segment)
+        self.snake = deque(self.initial_snake)
+        for segment in self.snake:
+            self.occupy_cell(segment)
+
+    def occupy_cell(self, cell):
+        i = cell[0] * self.grid_size + cell[1]
+        self.occupancy[i] = 1
+        slot = self.free_slot[i]
+        if slot >= 0:
+            # swap-remove from the free list
+            last = self.free_cells.pop()
+            if slot < len(self.free_cells):
+                self.free_cells[slot] = last
+                self.free_slot[last[0] * self.grid_size + last[1]] = slot
+            self.free_slot[i] = -1
+
+    def vacate_cell(self, cell):
+        i = cell[0] * self.grid_size + cell[1]
+        self.occupancy[i] = 0
+        if 0 < cell[0] < self.grid_size - 1 and 0 < cell[1] < self.grid_size - 1 and self.free_slot[i] < 0:
+            self.free_slot[i] = len(self.free_cells)
+            self.free_cells.append(cell)
+
+    def is_occupied(self, x, y):
+        if x < 0 or y < 0 or x >= self.grid_size or y >= self.grid_size:
+            return False
+        return self.occupancy[x * self.grid_size + y] == 1
+
+    def game_over(self):
+        self.running = False
+
+        self.reset_snake()
+        self.current_direction = 'RIGHT'
+        self.score = 0
+        self.food.reset(self)
+        self.generate_food()
+
+    def get_rng_state(self):
+        # everything later food placements depend on besides the moves: the generator, the food on the
+        # board and the order of the free cell list. Taken between episodes, for checkpoints
+        return {
+            'rng': self.rng.bit_generator.state,
+            'food_position': list(self.food_position) if self.food_position is not None else None,
+            'free_cells': [list(cell) for cell in self.free_cells],
+        }
+
+    def set_rng_state(self, state):
+        self.rng.bit_generator.state = state['rng']
+        self.food_position = tuple(state['food_position']) if state['food_position'] is not None else None
+        self.free_cells = [tuple(cell) for cell in state['free_cells']]
+        self.free_slot = [-1] * (self.grid_size * self.grid_size)
+        for slot, (x, y) in enumerate(self.free_cells):
+            self.free_slot[x * self.grid_size + y] = slot
+
+    def generate_food(self):
+        # None once the strategy has nothing left to place
+        self.food_position = self.food.next_food(self)
+        self.food_eaten = False
+
+    def move_snake(self, direction):
+        head = self.snake[0]
+        if direction == 'UP':
+            new_head = (head[0], head[1] - 1)
+        elif direction == 'DOWN':
+            new_head = (head[0], head[1] + 1)
+        elif direction == 'LEFT':
+            new_head = (head[0] - 1, head[1])
+        elif direction == 'RIGHT':
+            new_head = (head[0] + 1, head[1])
+        self.current_direction = direction
+
+        # collision check, the tail still counts as body
+        if new_head[0] <= 0 or new_head[0] >= self.grid_size - 1 or new_head[1] <= 0 or new_head[1] >= self.grid_size - 1:
+            self.death_cause = 'wall'
+            self.game_over()
+            return self.rewards.death
+        if self.is_occupied(*new_head):
+            self.death_cause = 'body'
+            self.game_over()
+            return self.rewards.death
+
+        self.snake.appendleft(new_head)
+        self.occupy_cell(new_head)
+        if new_head == self.food_position:
+            self.food_eaten = True
+            self.score += 1
+            self.generate_food()
+            return self.rewards.food
+        else:
+            self.vacate_cell(self.snake.pop())
+            # reward for each step survived
+            return self.rewards.step
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import argparse
+import multiprocessing as mp
+import numpy as np
+from . import qtable as qt
+from .env import SnakeEnv
+from .food import make_food
+from .vecenv import VecSnakeEnv
+from .agent import GameAgent
+from .mlp import MLPAgent
+
+# usage: python -m snakerl.evaluate q_table.npy checkpoints/ [--episodes 5000] [--env vec|single] [--food random|predefined] [--json results.json]
+
+def load_agent(path):
+    # a checkpoint directory or a q_table.npy saved by snakerl.train, memory-mapped read-only either way
+    if os.path.exists(os.path.join(path, 'network.npz')):
+        return MLPAgent.from_checkpoint(path, restore_rng=False, replay_buffer_size=1)
+    if os.path.isdir(path):
+        return GameAgent.from_checkpoint(path, mmap_mode='r', restore_rng=False, replay_buffer_size=1)
+    values = np.load(path, mmap_mode='r')
+    state_size, action_size = values.shape[:-1], values.shape[-1]
+    encoder = qt.StateEncoder(state_size)
+    q_table = qt.DenseQTable(encoder.num_states, action_size, values=values.reshape(encoder.num_states, action_size))
+    return GameAgent(state_size, action_size, q_table=q_table, replay_buffer_size=1)
+
+def evaluate_vectorized(agent, grid_size, episodes, num_envs, max_steps, seed):
+    venv = VecSnakeEnv(min(num_envs, episodes), grid_size=grid_size, seed=seed)
+    # every game plays a fixed share of the episodes and all of them are counted. Keeping the first
+    # episodes to finish instead would over-count short games, which restart and end again before
+    # the long ones are done
+    quota = np.full(venv.num_envs, episodes // venv.num_envs)
+    quota[:episodes % venv.num_envs] += 1
+    played = np.zeros(venv.num_envs, dtype=np.int64)
+    states = venv.get_states()
+    steps = np.zeros(venv.num_envs, dtype=np.int64)
+    scores, lengths, causes = [], [], []
+    total_steps = 0
+    while len(scores) < episodes:
+        active = played < quota
+        actions = np.argmax(agent.q_table.get_batch(states), axis=1)
+        scores_before = venv.score.copy()
+        states, rewards, dones = venv.step(actions)
+        steps += 1
+        total_steps += int(active.sum())
+
+        # a dying step never eats, so the score before it is the final score.
+        # games that played their share keep stepping with the others but are ignored
+        finished = np.flatnonzero(dones & active)
+        scores.extend(scores_before[finished].tolist())
+        lengths.extend(steps[finished].tolist())
+        causes.extend(np.where(venv.wall_hits[finished], 'wall', 'body').tolist())
+
+        # greedy policies can circle forever, cut those episodes off
+        timed_out = np.flatnonzero(~dones & active & (steps >= max_steps))
+        if len(timed_out) > 0:
+            scores.extend(venv.score[timed_out].tolist())
+            lengths.extend(steps[timed_out].tolist())
+            causes.extend(['timeout'] * len(timed_out))
+            states = venv.reset(timed_out)
+        played[finished] += 1
+        played[timed_out] += 1
+        steps[dones] = 0
+        steps[timed_out] = 0
+    return scores, lengths, causes, total_steps
+
+def evaluate_single(agent, grid_size, episodes, max_steps, seed, food='random', schedule_seed=967, schedule_path=None, viewer_factory=None):
+    # schedule_seed and schedule_path pick the predefined curriculum, as in the config the agent trained with.
+    # viewer_factory(game) renders the games, closing the window ends the evaluation early
+    game = SnakeEnv(grid_size=grid_size, food=make_food(food, schedule_seed, schedule_path), seed=seed)
+    viewer = viewer_factory(game) if viewer_factory is not None else None
+    scores, lengths, causes = [], [], []
+    total_steps = 0
+    for episode in range(episodes):
+        state = agent.get_state(game)
+        game.running = True
+        steps = 0
+        score = 0
+        while game.running and steps < max_steps:
+            if viewer is not None and not viewer.handle_events():
+                viewer.close()
+                return scores, lengths, causes, total_steps
+            score = game.score
+            game.move_snake(agent.actions[agent.choose_action(state)])
+            state = agent.get_state(game)
+            steps += 1
+            if viewer is not None:
+                viewer.render()
+        if game.running:
+            score = game.score
+            game.game_over()
+            causes.append('timeout')
+        else:
+            causes.append(game.death_cause)
+        scores.append(score)
+        lengths.append(steps)
+        total_steps += steps
+    if viewer is not None:
+        viewer.close()
+    return scores, lengths, causes, total_steps
+
+def summarize(path, scores, lengths, causes, total_steps, elapsed):
+    scores = np.array(scores)
+    lengths = np.array(lengths)
+    values, counts = np.unique(scores, return_counts=True)
+    return {
+        'q_table': path,
+        'episodes': len(scores),
+        'score_mean': float(scores.mean()),
+        'score_std': float(scores.std()),
+        'score_min': int(scores.min()),
+        'score_max': int(scores.max()),
+        'score_percentiles': {str(p): float(np.percentile(scores, p)) for p in (10, 25, 50, 75, 90, 99)},
+        'score_histogram': {str(value): int(count) for value, count in zip(values, counts)},
+        'length_mean': float(lengths.mean()),
+        'length_median': float(np.median(lengths)),
+        'length_max': int(lengths.max()),
+        'death_causes': {cause: causes.count(cause) for cause in ('wall', 'body', 'timeout')},
+        'steps_per_sec': total_steps / elapsed if elapsed > 0 else 0.0,
+        'elapsed_sec': elapsed,
+    }
+
+def format_report(report):
+    causes = report['death_causes']
+    return (f"{report['q_table']}: Mean Score: {report['score_mean']:.2f} (median {report['score_percentiles']['50']:.0f}, max {report['score_max']}), "
+            f"Mean Length: {report['length_mean']:.1f}, Deaths: {causes['wall']} wall / {causes['body']} body / {causes['timeout']} timeout, "
+            f"{report['steps_per_sec']:.0f} steps/sec")
+
+def evaluate(path, episodes=1000, env='vec', num_envs=1024, max_steps=2000, seed=0, food='random', schedule_seed=967, schedule_path=None):
+    if env == 'vec' and food != 'random':
+        raise ValueError("VecSnakeEnv only places random food, use env='single'")
+    agent = load_agent(path)
+    agent.epsilon = 0
+    grid_size = agent.state_size[2]
+    start = time.perf_counter()
+    if env == 'vec':
+        results = evaluate_vectorized(agent, grid_size, episodes, num_envs, max_steps, seed)
+    else:
+        results = evaluate_single(agent, grid_size, episodes, max_steps, seed, food, schedule_seed, schedule_path)
+    return summarize(path, *results, time.perf_counter() - start)
+
+def evaluate_many(paths, processes=None, **kwargs):
+    # every table is evaluated with the same seed, so all of them face the same food sequence
+    if len(paths) == 1:
+        return [evaluate(paths[0], **kwargs)]
+    with mp.Pool(processes or min(len(paths), os.cpu_count() or 1)) as pool:
+        return pool.starmap(evaluate_with_kwargs, [(path, kwargs) for path in paths])
+
+def evaluate_with_kwargs(path, kwargs):
+    return evaluate(path, **kwargs)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate saved Q-tables with a greedy policy")
+    parser.add_argument('q_tables', nargs='+', help="q_table.npy files or checkpoint directories")
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--env', choices=('vec', 'single'), default='vec', help="VecSnakeEnv or one headless SnakeEnv")
+    parser.add_argument('--food', choices=('random', 'predefined'), default='random', help="predefined needs --env single")
+    parser.add_argument('--schedule-seed', type=int, default=967, help="seed of the generated predefined food schedule")
+    parser.add_argument('--schedule-path', help="predefined food schedule file (.npy or \"x,y\" lines) instead of a generated one")
+    parser.add_argument('--num-envs', type=int, default=1024, help="games stepped at once with --env vec")
+    parser.add_argument('--max-steps', type=int, default=2000, help="episodes longer than this end as timeouts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, help="evaluate this many tables at once")
+    parser.add_argument('--json', help="write the full results to this file")
+    args = parser.parse_args()
+    if args.env == 'vec' and args.food != 'random':
+        parser.error("--food predefined needs --env single")
+
+    reports = evaluate_many(args.q_tables, args.processes, episodes=args.episodes, env=args.env, num_envs=args.num_envs, max_steps=args.max_steps, seed=args.seed, food=args.food,
+                            schedule_seed=args.schedule_seed, schedule_path=args.schedule_path)
+    for report in reports:
+        print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
@@ -0,0 +1,67 @@
+import numpy as np
+from .qtable import StateEncoder
+
+# state layout: food direction x/y, distance to the top/bottom/left/right wall,
+# obstacle up/down/left/right. Every cell's wall distances and off-grid probes never
+# change, so they are folded into one precomputed key per cell and only the food
+# direction and the in-grid obstacle probes are looked up per step.
+
+PROBES = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+def state_size_for(grid_size):
+    return (3, 3, grid_size, grid_size, grid_size, grid_size, 2, 2, 2, 2)
+
+class StateExtractor:
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        self.state_size = state_size_for(grid_size)
+        self.encoder = StateEncoder(self.state_size)
+        strides = self.encoder.strides
+        self.probe_strides = strides[6:]
+        g = grid_size
+        xs, ys = np.divmod(np.arange(g * g), g)
+
+        # wall distances plus the probes that fall off the grid, keyed by x * grid_size + y
+        self.cell_keys = ys * strides[2] + (g - 1 - ys) * strides[3] + xs * strides[4] + (g - 1 - xs) * strides[5]
+        # neighbouring cell for each probe, the cell itself where the probe leaves the grid
+        self.neighbors = np.empty((g * g, 4), dtype=np.int64)
+        self.inside = np.empty((g * g, 4), dtype=bool)
+        for d, (dx, dy) in enumerate(PROBES):
+            nx, ny = xs + dx, ys + dy
+            inside = (nx >= 0) & (nx < g) & (ny >= 0) & (ny < g)
+            self.cell_keys = self.cell_keys + np.where(inside, 0, self.probe_strides[d])
+            self.neighbors[:, d] = np.where(inside, nx * g + ny, xs * g + ys)
+            self.inside[:, d] = inside
+
+        # food direction by food - head + grid_size, -1 maps to the same digit as StateEncoder
+        offsets = np.arange(-g, g + 1)
+        self.food_x_keys = (np.sign(offsets) % 3) * strides[0]
+        self.food_y_keys = (np.sign(offsets) % 3) * strides[1]
+
+        # plain lists for the single-game path, indexing them is cheaper than numpy scalars
+        self.cell_key_list = self.cell_keys.tolist()
+        self.food_x_list = self.food_x_keys.tolist()
+        self.food_y_list = self.food_y_keys.tolist()
+        self.probe_list = [[(int(n), int(s)) for n, s, i in zip(self.neighbors[c], self.probe_strides, self.inside[c]) if i] for c in range(g * g)]
+
+    def index(self, occupancy, head, food):
+        # one game: occupancy is the env's flat bytearray, food None when the board has none
+        g = self.grid_size
+        cell = head[0] * g + head[1]
+        food_x, food_y = food if food is not None else (-1, -1)
+        key = self.cell_key_list[cell] + self.food_x_list[food_x - head[0] + g] + self.food_y_list[food_y - head[1] + g]
+        for neighbor, stride in self.probe_list[cell]:
+            if occupancy[neighbor]:
+                key += stride
+        return key
+
+    def index_batch(self, occupancy, heads, foods):
+        # many games at once: occupancy (n, grid_size * grid_size), heads and foods (n, 2)
+        g = self.grid_size
+        heads = np.asarray(heads, dtype=np.int64)
+        foods = np.asarray(foods, dtype=np.int64)
+        cells = heads[:, 0] * g + heads[:, 1]
+        keys = self.cell_keys[cells] + self.food_x_keys[foods[:, 0] - heads[:, 0] + g] + self.food_y_keys[foods[:, 1] - heads[:, 1] + g]
+        rows = np.arange(len(cells))[:, None]
+        blocked = (occupancy[rows, self.neighbors[cells]] != 0) & self.inside[cells]
+        return keys + blocked @ self.probe_strides
@@ -0,0 +1,64 @@
+import numpy as np
+
+def generate_schedule(grid_size, seed=967, length=51):
+    # distinct interior cells drawn from a generator of their own, one curriculum per seed
+    rng = np.random.default_rng(seed)
+    food_positions = []
+    while len(food_positions) < length:
+        food_x = int(rng.integers(1, grid_size - 1))
+        food_y = int(rng.integers(1, grid_size - 1))
+        if (food_x, food_y) not in food_positions:
+            food_positions.append((food_x, food_y))
+    return tuple(food_positions)
+
+def load_schedule(path):
+    # .npy arrays of shape (n, 2) or text files with one "x,y" per line
+    if path.endswith('.npy'):
+        positions = np.load(path)
+    else:
+        positions = np.loadtxt(path, delimiter=',', dtype=np.int64, ndmin=2)
+    return tuple((int(x), int(y)) for x, y in positions)
+
+def save_schedule(path, food_positions):
+    if path.endswith('.npy'):
+        np.save(path, np.array(food_positions, dtype=np.int64))
+    else:
+        np.savetxt(path, np.array(food_positions, dtype=np.int64), delimiter=',', fmt='%d')
+
+class RandomFood:
+    # a uniformly random free cell, drawn from the env's own generator
+    def reset(self, env):
+        pass
+
+    def next_food(self, env):
+        if not env.free_cells:
+            return None
+        return env.free_cells[env.rng.integers(len(env.free_cells))]
+
+class ScheduledFood:
+    # a fixed sequence of cells, eating advances the cursor and every new game rewinds it
+    def __init__(self, food_positions=None, seed=967):
+        self.seed = seed
+        self.food_positions = None
+        if food_positions is not None:
+            self.food_positions = tuple((int(x), int(y)) for x, y in food_positions)
+        self.cursor = 0
+
+    def reset(self, env):
+        if self.food_positions is None:
+            self.food_positions = generate_schedule(env.grid_size, self.seed)
+        self.cursor = 0
+
+    def next_food(self, env):
+        if self.cursor >= len(self.food_positions):
+            return None
+        food = self.food_positions[self.cursor]
+        self.cursor += 1
+        return food
+
+def make_food(name, seed=967, schedule_path=None):
+    if name == 'random':
+        return RandomFood()
+    if name == 'predefined':
+        return ScheduledFood(load_schedule(schedule_path) if schedule_path is not None else None, seed)
+    raise ValueError(f"Unknown food strategy: {name}")
@@ -0,0 +1,37 @@
+import pygame
+from .env import SnakeEnv
+from .viewer import SnakeVisual
+
+# usage: python -m snakerl.human, steer with the arrow keys
+
+KEY_DIRECTIONS = {pygame.K_UP: 'UP', pygame.K_DOWN: 'DOWN', pygame.K_LEFT: 'LEFT', pygame.K_RIGHT: 'RIGHT'}
+
+def run_game(grid_size=35, cell_size=15, fps=5, food=None, seed=None):
+    middle = grid_size // 2
+    game = SnakeEnv(grid_size=grid_size, food=food, seed=seed, initial_snake=((middle, middle), (middle - 1, middle), (middle - 2, middle)))
+    viewer = SnakeVisual(game, cell_size=cell_size, fps=fps)
+    direction = ['RIGHT']
+
+    def steer(key):
+        # only turns are allowed, checked against the direction of the last move
+        new_direction = KEY_DIRECTIONS.get(key)
+        if game.current_direction in ['LEFT', 'RIGHT'] and new_direction in ['UP', 'DOWN']:
+            direction[0] = new_direction
+        elif game.current_direction in ['UP', 'DOWN'] and new_direction in ['LEFT', 'RIGHT']:
+            direction[0] = new_direction
+
+    game.running = True
+    score = 0
+    while game.running and viewer.handle_events(on_key=steer):
+        # game_over resets the score, so keep the one from before the move
+        game.move_snake(direction[0])
+        if not game.running:
+            print("Game Over! Your Score: ", score)
+            break
+        score = game.score
+        viewer.render()
+    viewer.close()
+    return score
+
+if __name__ == "__main__":
+    run_game()
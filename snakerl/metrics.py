@@ -0,0 +1,112 @@
+import csv
+import json
+import time
+from collections import deque
+
+PHASES = ('action', 'env_step', 'state', 'buffer_add', 'sample', 'update', 'render')
+
+class StdoutSink:
+    def write(self, record):
+        print(f"Episode {record['episode']}: Mean Score: {record['mean_score']:.2f}, Max Score: {record['max_score']}, "
+              f"Mean Reward: {record['mean_reward']:.1f}, Epsilon: {record['epsilon']:.3f}, {record['steps_per_sec']:.0f} steps/sec")
+
+    def close(self):
+        pass
+
+class JsonlSink:
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class CsvSink:
+    def __init__(self, path):
+        self.file = open(path, 'a', newline='')
+        self.writer = None
+
+    def write(self, record):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(record))
+            if self.file.tell() == 0:
+                self.writer.writeheader()
+        self.writer.writerow(record)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class RingBufferSink:
+    def __init__(self, capacity=1000):
+        self.records = deque(maxlen=capacity)
+
+    def write(self, record):
+        self.records.append(record)
+
+    def close(self):
+        pass
+
+class TrainingMetrics:
+    # accumulates per-phase step timings and episode stats, emitting one record every `interval` episodes.
+    # episodes is the count a resumed run starts from, so records keep the agent's episode numbers
+    def __init__(self, sink, interval=100, episodes=0):
+        self.sink = sink
+        self.interval = interval
+        self.episodes = episodes
+        self.steps = 0
+        self.reset_window()
+
+    def reset_window(self):
+        self.phase_time = dict.fromkeys(PHASES, 0.0)
+        self.window_episodes = 0
+        self.window_steps = 0
+        self.window_score = 0
+        self.window_max_score = 0
+        self.window_reward = 0
+        self.window_start = time.perf_counter()
+
+    def lap(self, phase, start):
+        now = time.perf_counter()
+        self.phase_time[phase] += now - start
+        return now
+
+    def end_episode(self, steps, score, total_reward, epsilon):
+        self.episodes += 1
+        self.steps += steps
+        self.window_episodes += 1
+        self.window_steps += steps
+        self.window_score += score
+        self.window_max_score = max(self.window_max_score, score)
+        self.window_reward += total_reward
+        self.epsilon = epsilon
+        if self.window_episodes >= self.interval:
+            self.emit()
+
+    def emit(self):
+        if self.window_episodes == 0:
+            return
+        elapsed = time.perf_counter() - self.window_start
+        steps = max(self.window_steps, 1)
+        record = {
+            'episode': self.episodes,
+            'steps': self.steps,
+            'window_episodes': self.window_episodes,
+            'window_steps': self.window_steps,
+            'mean_score': self.window_score / self.window_episodes,
+            'max_score': self.window_max_score,
+            'mean_reward': self.window_reward / self.window_episodes,
+            'epsilon': self.epsilon,
+            'steps_per_sec': self.window_steps / elapsed if elapsed > 0 else 0.0,
+        }
+        for phase in PHASES:
+            record[f"{phase}_us"] = self.phase_time[phase] / steps * 1e6
+        self.sink.write(record)
+        self.reset_window()
+
+    def close(self):
+        self.emit()
+        self.sink.close()
@@ -0,0 +1,207 @@
+import os
+import json
+import numpy as np
+from . import checkpoint as ckpt
+from .agent import GameAgent, ExperienceReplayBuffer
+from .features import StateExtractor
+
+# a Q-function over the ten state features instead of a table over their combinations, so the
+# parameter count depends only on the layer sizes and not on the board. States stay the same
+# integer keys as for the tabular agent (replay buffers, envs and evaluate are shared) and are
+# decoded to normalized features in front of the first layer.
+
+class QNetwork:
+    # fully connected ReLU network, hidden=() makes it linear. get/get_batch mirror the Q-table
+    # backends, so GameAgent.choose_action(s) and evaluate work on it unchanged
+    def __init__(self, features, action_size, hidden=(64, 64), dtype=np.float32):
+        self.features = features
+        self.action_size = action_size
+        self.hidden = tuple(hidden)
+        self.dtype = np.dtype(dtype)
+        self.strides = features.encoder.strides
+        self.radices = features.encoder.radices
+        self.wall_scale = 1.0 / max(features.grid_size - 1, 1)
+        sizes = (len(self.radices),) + self.hidden + (action_size,)
+        self.params = []
+        for fan_in, fan_out in zip(sizes[:-1], sizes[1:]):
+            self.params.append(np.zeros((fan_in, fan_out), dtype=self.dtype))
+            self.params.append(np.zeros(fan_out, dtype=self.dtype))
+
+    def initialize(self, rng):
+        # He initialization for the ReLU layers, zero biases
+        for weights in self.params[0::2]:
+            weights[...] = rng.standard_normal(weights.shape) * np.sqrt(2.0 / weights.shape[0])
+
+    def inputs(self, keys):
+        # food direction in -1/0/1, wall distances scaled to 0..1, obstacle flags 0/1
+        digits = np.asarray(keys, dtype=np.int64)[:, None] // self.strides % self.radices
+        x = digits.astype(self.dtype)
+        x[:, :2] = np.where(digits[:, :2] == 2, -1, digits[:, :2])
+        x[:, 2:6] *= self.wall_scale
+        return x
+
+    def forward(self, x, keep=False):
+        activations = [x]
+        layers = len(self.params) // 2
+        for i in range(layers):
+            x = x @ self.params[2 * i] + self.params[2 * i + 1]
+            if i < layers - 1:
+                x = np.maximum(x, 0)
+            if keep:
+                activations.append(x)
+        return (x, activations) if keep else x
+
+    def backward(self, activations, grad_out):
+        # gradients for every parameter given dLoss/dQ, activations from forward(keep=True)
+        grads = [None] * len(self.params)
+        grad = grad_out
+        for i in range(len(self.params) // 2 - 1, -1, -1):
+            grads[2 * i] = activations[i].T @ grad
+            grads[2 * i + 1] = grad.sum(axis=0)
+            if i > 0:
+                grad = (grad @ self.params[2 * i].T) * (activations[i] > 0)
+        return grads
+
+    def get(self, key):
+        return self.get_batch(np.array([key], dtype=np.int64))[0]
+
+    def get_batch(self, keys):
+        return self.forward(self.inputs(keys))
+
+    def copy_from(self, other):
+        for mine, theirs in zip(self.params, other.params):
+            mine[...] = theirs
+
+    def nbytes(self):
+        return sum(param.nbytes for param in self.params)
+
+    def num_params(self):
+        return sum(param.size for param in self.params)
+
+class Adam:
+    def __init__(self, params, lr=1e-3, beta1=0.9, beta2=0.999, eps=1e-8, max_norm=10.0):
+        self.lr = lr
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.max_norm = max_norm
+        self.m = [np.zeros_like(param) for param in params]
+        self.v = [np.zeros_like(param) for param in params]
+        self.t = 0
+
+    def step(self, params, grads):
+        # global norm clipping keeps a burst of large TD errors from wrecking the weights
+        norm = np.sqrt(sum(float(np.sum(grad * grad)) for grad in grads))
+        scale = min(1.0, self.max_norm / norm) if norm > 0 else 1.0
+        self.t += 1
+        correction1 = 1 - self.beta1 ** self.t
+        correction2 = 1 - self.beta2 ** self.t
+        for param, grad, m, v in zip(params, grads, self.m, self.v):
+            grad = grad * scale
+            m *= self.beta1
+            m += (1 - self.beta1) * grad
+            v *= self.beta2
+            v += (1 - self.beta2) * grad * grad
+            param -= (self.lr * (m / correction1) / (np.sqrt(v / correction2) + self.eps)).astype(param.dtype)
+
+class MLPAgent(GameAgent):
+    # same get_state/choose_action/train/train_vectorized interface as GameAgent, alpha is the Adam
+    # step size. Rewards are scaled by reward_scale inside the loss only, the greedy action is unaffected
+    def __init__(self, state_size, action_size, alpha=1e-3, gamma=0.9, epsilon=0.1, replay_buffer_size=100000, batch_size=128, hidden=(64, 64),
+                 update_every=4, target_update=500, reward_scale=0.01, network=None, replay_buffer=None, seed=None, epsilon_schedule=None):
+        if network is None:
+            network = QNetwork(StateExtractor(state_size[2]), action_size, hidden)
+            initialize = True
+        else:
+            initialize = False
+        super().__init__(state_size, action_size, alpha=alpha, gamma=gamma, epsilon=epsilon, replay_buffer_size=replay_buffer_size, batch_size=batch_size,
+                         q_table=network, replay_buffer=replay_buffer, seed=seed, epsilon_schedule=epsilon_schedule)
+        if initialize:
+            network.initialize(self.rng)
+        self.network = network
+        # a lagging copy for the TD targets, synced every target_update updates
+        self.target_network = QNetwork(network.features, action_size, network.hidden, network.dtype)
+        self.target_network.copy_from(network)
+        self.optimizer = Adam(network.params, lr=alpha)
+        self.update_every = update_every
+        self.target_update = target_update
+        self.reward_scale = reward_scale
+        self.updates = 0
+
+    def update_q_network(self, batch):
+        states, actions, rewards, next_states, dones = batch
+        if len(states) == 0:
+            return
+        rows = np.arange(len(states))
+        actions = actions.astype(np.intp)
+        # double Q-learning: the online network picks the next action, the target network values it
+        next_inputs = self.network.inputs(next_states)
+        best_next_actions = np.argmax(self.network.forward(next_inputs), axis=1)
+        next_q = self.target_network.forward(next_inputs)[rows, best_next_actions]
+        # a dead snake's next state is the reset board, it must not feed back into the target
+        target = rewards * self.reward_scale + self.gamma * next_q * (1 - dones.astype(next_q.dtype))
+
+        q, activations = self.network.forward(self.network.inputs(states), keep=True)
+        error = q[rows, actions] - target
+        # Huber loss, mean over the batch
+        grad_out = np.zeros_like(q)
+        grad_out[rows, actions] = np.clip(error, -1, 1) / len(states)
+        self.optimizer.step(self.network.params, self.network.backward(activations, grad_out))
+        self.updates += 1
+        if self.updates % self.target_update == 0:
+            self.target_network.copy_from(self.network)
+
+    def update_q_batch(self, states, actions, rewards, next_states):
+        self.update_q_network((states, actions, rewards, next_states, np.zeros(len(states), dtype=bool)))
+
+    def save_checkpoint(self, path, game=None):
+        # network.npz holds the online and target weights and the Adam moments, meta.json goes last
+        os.makedirs(path, exist_ok=True)
+        meta = {
+            'agent': 'mlp', 'state_size': list(self.state_size), 'action_size': self.action_size, 'hidden': list(self.network.hidden),
+            'alpha': self.alpha, 'gamma': self.gamma, 'epsilon': self.epsilon, 'batch_size': self.batch_size,
+            'update_every': self.update_every, 'target_update': self.target_update, 'reward_scale': self.reward_scale,
+            'episodes_trained': self.episodes_trained, 'steps_trained': self.steps_trained, 'updates': self.updates, 'adam_t': self.optimizer.t,
+        }
+        arrays = {}
+        for i, param in enumerate(self.network.params):
+            arrays[f"param{i}"] = param
+            arrays[f"target{i}"] = self.target_network.params[i]
+            arrays[f"adam_m{i}"] = self.optimizer.m[i]
+            arrays[f"adam_v{i}"] = self.optimizer.v[i]
+        np.savez(os.path.join(path, 'network.tmp.npz'), **arrays)
+        os.replace(os.path.join(path, 'network.tmp.npz'), os.path.join(path, 'network.npz'))
+        rng_state = {'agent': self.rng.bit_generator.state}
+        if game is not None:
+            rng_state['env'] = game.get_rng_state()
+        ckpt.save_rng_state(path, rng_state)
+        if isinstance(self.replay_buffer, ExperienceReplayBuffer):
+            ckpt.save_replay(path, self.replay_buffer)
+        ckpt.write_atomic(os.path.join(path, 'meta.json'), json.dumps(meta, indent=2).encode())
+
+    @classmethod
+    def from_checkpoint(cls, path, mmap_mode=None, restore_rng=True, **kwargs):
+        # mmap_mode is accepted for GameAgent compatibility, the weights are small enough to load
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        agent = cls(tuple(meta['state_size']), meta['action_size'], alpha=meta['alpha'], gamma=meta['gamma'], epsilon=meta['epsilon'], batch_size=meta['batch_size'],
+                    hidden=tuple(meta['hidden']), update_every=meta['update_every'], target_update=meta['target_update'], reward_scale=meta['reward_scale'], **kwargs)
+        with np.load(os.path.join(path, 'network.npz')) as data:
+            for i in range(len(agent.network.params)):
+                agent.network.params[i][...] = data[f"param{i}"]
+                agent.target_network.params[i][...] = data[f"target{i}"]
+                agent.optimizer.m[i][...] = data[f"adam_m{i}"]
+                agent.optimizer.v[i][...] = data[f"adam_v{i}"]
+        agent.optimizer.t = meta['adam_t']
+        agent.updates = meta['updates']
+        agent.episodes_trained = meta['episodes_trained']
+        agent.steps_trained = meta.get('steps_trained', 0)
+        rng_state = ckpt.load_rng_state(path) if restore_rng else {}
+        if 'agent' in rng_state:
+            agent.rng.bit_generator.state = rng_state['agent']
+        if restore_rng and isinstance(agent.replay_buffer, ExperienceReplayBuffer):
+            ckpt.load_replay(path, agent.replay_buffer)
+        return agent
+
+    def q_table_report(self):
+        return f"Q-network: {' x '.join(str(size) for size in (len(self.network.radices),) + self.network.hidden + (self.action_size,))}, {self.network.num_params()} parameters, {self.network.nbytes() / 1e3:.1f} kB, {self.updates} updates"
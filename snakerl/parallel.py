@@ -0,0 +1,256 @@
+import os
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from . import qtable as qt
+from .agent import GameAgent
+
+def shared_array(shape, dtype, name=None):
+    # a NumPy view on a named shared memory block, created zeroed or attached by name
+    size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    if name is None:
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        array[...] = 0
+    else:
+        shm = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return shm, array
+
+class SharedQTable(qt.DenseQTable):
+    def __init__(self, num_states, action_size, dtype=np.float64, name=None):
+        self.num_states = num_states
+        self.dtype = np.dtype(dtype)
+        self.shm, values = shared_array((num_states, action_size), self.dtype, name)
+        super().__init__(num_states, action_size, dtype, values)
+
+    def __getstate__(self):
+        return (self.num_states, self.action_size, self.dtype, self.shm.name)
+
+    def __setstate__(self, state):
+        num_states, action_size, dtype, name = state
+        self.__init__(num_states, action_size, dtype, name)
+
+    def close(self, unlink=False):
+        del self.values
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+class SharedReplayBuffer:
+    # every worker appends to its own stripe without locking, sampling draws from all stripes
+    def __init__(self, workers, buffer_size, state_dtype=np.int64, names=None):
+        self.workers = workers
+        self.buffer_size = buffer_size
+        self.state_dtype = np.dtype(state_dtype)
+        self.stripe_size = max(buffer_size // workers, 1)
+        self.worker = 0
+        self.rng = np.random.default_rng()
+        layout = {
+            'states': ((workers, self.stripe_size), self.state_dtype),
+            'actions': ((workers, self.stripe_size), np.int8),
+            'rewards': ((workers, self.stripe_size), np.float32),
+            'next_states': ((workers, self.stripe_size), self.state_dtype),
+            'dones': ((workers, self.stripe_size), bool),
+            'written': ((workers,), np.int64),
+        }
+        self.shms = {}
+        for field, (shape, dtype) in layout.items():
+            self.shms[field], array = shared_array(shape, dtype, None if names is None else names[field])
+            setattr(self, field, array)
+
+    def __getstate__(self):
+        names = {field: shm.name for field, shm in self.shms.items()}
+        return (self.workers, self.buffer_size, self.state_dtype, names, self.worker)
+
+    def __setstate__(self, state):
+        workers, buffer_size, state_dtype, names, worker = state
+        self.__init__(workers, buffer_size, state_dtype, names)
+        self.worker = worker
+
+    def __len__(self):
+        return int(np.minimum(self.written, self.stripe_size).sum())
+
+    def add_experience(self, experience):
+        state, action, reward, next_state, done = experience
+        w = self.worker
+        row = self.written[w] % self.stripe_size
+        self.states[w, row] = state
+        self.actions[w, row] = action
+        self.rewards[w, row] = reward
+        self.next_states[w, row] = next_state
+        self.dones[w, row] = done
+        self.written[w] += 1
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        w = self.worker
+        count = min(len(states), self.stripe_size)
+        rows = (self.written[w] + np.arange(count)) % self.stripe_size
+        self.states[w, rows] = states[-count:]
+        self.actions[w, rows] = actions[-count:]
+        self.rewards[w, rows] = rewards[-count:]
+        self.next_states[w, rows] = next_states[-count:]
+        self.dones[w, rows] = dones[-count:]
+        self.written[w] += len(states)
+
+    def sample_batch(self, batch_size):
+        sizes = np.minimum(self.written, self.stripe_size)
+        ends = np.cumsum(sizes)
+        total = int(ends[-1])
+        if total == 0:
+            flat = np.zeros(0, dtype=np.int64)
+        else:
+            flat = self.rng.integers(0, total, size=min(batch_size, total))
+        stripes = np.searchsorted(ends, flat, side='right')
+        rows = flat - (ends[stripes] - sizes[stripes])
+        return self.states[stripes, rows], self.actions[stripes, rows], self.rewards[stripes, rows], self.next_states[stripes, rows], self.dones[stripes, rows]
+
+    def close(self, unlink=False):
+        for field, shm in self.shms.items():
+            delattr(self, field)
+            shm.close()
+            if unlink:
+                shm.unlink()
+
+def run_worker(worker_id, seed_seq, q_table, visits, replay_buffer, episodes_done, base, make_env, state_size, action_size, episodes, learn, agent_kwargs):
+    env_seed, agent_seed = seed_seq.spawn(2)
+    replay_buffer.worker = worker_id
+    agent = GameAgent(state_size, action_size, q_table=q_table, visits=visits, replay_buffer=replay_buffer, seed=agent_seed, **agent_kwargs)
+    replay_buffer.rng = agent.rng
+    game = make_env(env_seed)
+    for episode in range(episodes):
+        # epsilon schedules follow the episodes of the whole run, not this worker's share
+        agent.episodes_trained = base + int(episodes_done.sum())
+        agent.train(game, 1, learn=learn)
+        episodes_done[worker_id] += 1
+    q_table.close()
+    if visits is not None:
+        visits.close()
+    replay_buffer.close()
+
+def run_learner(seed_seq, q_table, visits, replay_buffer, updates_done, stop, state_size, action_size, batch_size, agent_kwargs):
+    agent = GameAgent(state_size, action_size, q_table=q_table, visits=visits, replay_buffer=replay_buffer, seed=seed_seq, **agent_kwargs)
+    replay_buffer.rng = agent.rng
+    while not stop.is_set():
+        batch = replay_buffer.sample_batch(batch_size)
+        if len(batch[0]) == 0:
+            time.sleep(0.001)
+            continue
+        agent.update_q_network(batch)
+        updates_done[0] += 1
+    q_table.close()
+    if visits is not None:
+        visits.close()
+    replay_buffer.close()
+
+def check_backend(agent_kwargs, resume=None):
+    # workers share one table through shared memory, which only the dense layout supports
+    q_backend = agent_kwargs.pop('q_backend', 'dense')
+    if resume is not None:
+        q_backend = qt.backend_of(resume.q_table)
+    if q_backend != 'dense':
+        raise ValueError(f"multi-process training shares a dense Q-table, q_backend '{q_backend}' needs workers=1")
+
+def save_shared(agent, episodes_trained, path):
+    # workers write the shared table directly, so every block counts as changed
+    agent.q_table.dirty_blocks[:] = True
+    if agent.visits is not None:
+        agent.visits.dirty_blocks[:] = True
+    agent.episodes_trained = episodes_trained
+    agent.save_checkpoint(path)
+
+def train_parallel(state_size, action_size, make_env, episodes, workers=None, mode='hogwild', seed=0, replay_buffer_size=100000, learner_batch_size=1024, report_interval=5.0,
+                   checkpoint_dir=None, checkpoint_interval=500, resume=None, **agent_kwargs):
+    # resume: an agent loaded from a checkpoint, its table seeds the shared one and episodes count on from it.
+    # With checkpoint_dir the shared table is saved at the first progress report after every checkpoint_interval episodes
+    if mode not in ('hogwild', 'learner'):
+        raise ValueError(f"Unknown parallel training mode: {mode}")
+    check_backend(agent_kwargs, resume)
+    # make_env(seed) builds each worker's game and has to pickle, e.g. a functools.partial
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, episodes))
+
+    encoder = qt.StateEncoder(state_size)
+    state_dtype = np.int32 if encoder.num_states < 2 ** 31 else np.int64
+    q_dtype = agent_kwargs.pop('q_dtype', np.float64) if resume is None else resume.q_table.dtype
+    q_table = SharedQTable(encoder.num_states, action_size, q_dtype)
+    base = 0
+    if resume is not None:
+        q_table.values[...] = resume.q_table.values
+        base = resume.episodes_trained
+    visits = None
+    if agent_kwargs.get('count_visits') or getattr(agent_kwargs.get('learning_rate'), 'uses_visits', False):
+        # the visit counters are shared like the table, updated without locking as well
+        visits = SharedQTable(encoder.num_states, action_size, np.uint16)
+        if resume is not None and resume.visits is not None:
+            visits.values[...] = resume.visits.values
+    replay_buffer = SharedReplayBuffer(workers, replay_buffer_size, state_dtype)
+    counters_shm, episodes_done = shared_array((workers,), np.int64)
+    updates_shm, updates_done = shared_array((1,), np.int64)
+
+    # independent, reproducible streams for every worker and the learner, a resumed run draws new ones
+    seeds = np.random.SeedSequence(seed if base == 0 else [seed, base]).spawn(workers + 1)
+    learn = mode == 'hogwild'
+    processes = []
+    try:
+        for worker_id in range(workers):
+            worker_episodes = episodes // workers + (1 if worker_id < episodes % workers else 0)
+            processes.append(mp.Process(target=run_worker, args=(worker_id, seeds[worker_id], q_table, visits, replay_buffer, episodes_done, base, make_env, state_size, action_size, worker_episodes, learn, agent_kwargs)))
+        stop = mp.Event()
+        learner = None
+        if mode == 'learner':
+            learner = mp.Process(target=run_learner, args=(seeds[-1], q_table, visits, replay_buffer, updates_done, stop, state_size, action_size, learner_batch_size, agent_kwargs))
+
+        saver = None
+        if checkpoint_dir is not None:
+            saver = GameAgent(state_size, action_size, q_table=q_table, visits=visits, replay_buffer_size=1, seed=seed, **agent_kwargs)
+        next_checkpoint = (base // checkpoint_interval + 1) * checkpoint_interval
+
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        if learner is not None:
+            learner.start()
+
+        while any(process.is_alive() for process in processes):
+            for process in processes:
+                process.join(timeout=report_interval / len(processes))
+            elapsed = time.perf_counter() - start
+            print(f"Workers: {workers}, Episodes: {episodes_done.sum()}, Steps: {replay_buffer.written.sum()}, {episodes_done.sum() / elapsed:.1f} episodes/sec, {replay_buffer.written.sum() / elapsed:.0f} steps/sec")
+            if saver is not None and base + episodes_done.sum() >= next_checkpoint:
+                save_shared(saver, base + int(episodes_done.sum()), checkpoint_dir)
+                next_checkpoint = (saver.episodes_trained // checkpoint_interval + 1) * checkpoint_interval
+
+        stop.set()
+        if learner is not None:
+            learner.join()
+        failed = [process.exitcode for process in processes + ([learner] if learner is not None else []) if process.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"{len(failed)} training processes failed (exit codes {failed})")
+        elapsed = time.perf_counter() - start
+        print(f"Finished {episodes_done.sum()} episodes ({replay_buffer.written.sum()} steps) in {elapsed:.1f}s: {episodes_done.sum() / elapsed:.1f} episodes/sec, {updates_done[0]} learner updates")
+
+        # hand back an ordinary agent holding private copies of the shared tables
+        agent_visits = None
+        if visits is not None:
+            agent_visits = qt.DenseQTable(encoder.num_states, action_size, np.uint16)
+            agent_visits.values[...] = visits.values
+        agent = GameAgent(state_size, action_size, q_table=qt.DenseQTable(encoder.num_states, action_size, q_table.dtype), visits=agent_visits, seed=seed, **agent_kwargs)
+        agent.q_table.values[...] = q_table.values
+        agent.episodes_trained = base + int(episodes_done.sum())
+        return agent
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        q_table.close(unlink=True)
+        if visits is not None:
+            visits.close(unlink=True)
+        replay_buffer.close(unlink=True)
+        del episodes_done, updates_done
+        counters_shm.close()
+        counters_shm.unlink()
+        updates_shm.close()
+        updates_shm.unlink()
@@ -0,0 +1,194 @@
+import os
+import time
+import queue as queue_module
+import multiprocessing as mp
+import numpy as np
+from . import qtable as qt
+from .agent import GameAgent
+from .parallel import SharedQTable, shared_array, check_backend
+
+# actors step their own games on a published snapshot of the Q-table and push transitions in
+# chunks through a bounded queue, a full queue blocks them until the learner catches up. The
+# learner keeps the only writable table, trains from its own replay buffer at a fixed
+# update-to-data ratio and republishes the rows it changed every publish_interval updates.
+
+class ChunkSender:
+    # stands in for the actor's replay buffer, GameAgent.train only ever calls add_experience on it
+    def __init__(self, queue, chunk_size, state_dtype, version, blocked, actor_id):
+        self.queue = queue
+        self.chunk_size = chunk_size
+        self.version = version
+        self.blocked = blocked
+        self.actor_id = actor_id
+        self.states = np.zeros(chunk_size, dtype=state_dtype)
+        self.actions = np.zeros(chunk_size, dtype=np.int8)
+        self.rewards = np.zeros(chunk_size, dtype=np.float32)
+        self.next_states = np.zeros(chunk_size, dtype=state_dtype)
+        self.dones = np.zeros(chunk_size, dtype=bool)
+        self.count = 0
+        self.chunk_version = 0
+
+    def add_experience(self, experience):
+        if self.count == 0:
+            # the snapshot this chunk was collected with, for the learner's staleness check
+            self.chunk_version = int(self.version[0])
+        state, action, reward, next_state, done = experience
+        i = self.count
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.count += 1
+        if self.count == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.count == 0:
+            return
+        n = self.count
+        chunk = (self.chunk_version, self.states[:n].copy(), self.actions[:n].copy(), self.rewards[:n].copy(), self.next_states[:n].copy(), self.dones[:n].copy())
+        try:
+            self.queue.put_nowait(chunk)
+        except queue_module.Full:
+            # backpressure, the learner is behind
+            start = time.perf_counter()
+            self.queue.put(chunk)
+            self.blocked[self.actor_id] += time.perf_counter() - start
+        self.count = 0
+
+def run_actor(actor_id, seed_seq, snapshot, queue, version, episodes_done, base, blocked, make_env, state_size, action_size, episodes, chunk_size, state_dtype, agent_kwargs):
+    env_seed, agent_seed = seed_seq.spawn(2)
+    sender = ChunkSender(queue, chunk_size, state_dtype, version, blocked, actor_id)
+    # actors never update, so they need no learning rate or visit counters
+    agent_kwargs = dict(agent_kwargs, learning_rate=None, count_visits=False)
+    agent = GameAgent(state_size, action_size, q_table=snapshot, replay_buffer=sender, seed=agent_seed, **agent_kwargs)
+    game = make_env(env_seed)
+    for episode in range(episodes):
+        # epsilon schedules follow the episodes of the whole run, not this actor's share
+        agent.episodes_trained = base + int(episodes_done.sum())
+        agent.train(game, 1, learn=False)
+        episodes_done[actor_id] += 1
+    sender.flush()
+    # None tells the learner this actor is done
+    queue.put(None)
+    snapshot.close()
+
+def train_async(state_size, action_size, make_env, episodes, actors=None, seed=0, queue_size=64, chunk_size=256, batch_size=1024, update_to_data=4.0, publish_interval=10, max_staleness=None, replay_buffer_size=100000, report_interval=5.0,
+                checkpoint_dir=None, checkpoint_interval=500, resume=None, **agent_kwargs):
+    # update_to_data: transitions sampled for updates per transition received, so each update
+    # of batch_size rows waits for batch_size / update_to_data new ones.
+    # max_staleness: chunks acted with a snapshot more than this many updates behind the learner
+    # are dropped, None keeps everything (Q-learning is off-policy, old data is still valid).
+    # resume and checkpoint_dir work as in parallel.train_parallel, the learner saves its own table
+    if update_to_data <= 0:
+        raise ValueError("update_to_data must be positive")
+    if max_staleness is not None and max_staleness < publish_interval:
+        raise ValueError("max_staleness below publish_interval would drop data acted with the newest snapshot")
+    if actors is None:
+        actors = max((os.cpu_count() or 2) - 1, 1)
+    actors = max(1, min(actors, episodes))
+    check_backend(agent_kwargs, resume)
+
+    encoder = qt.StateEncoder(state_size)
+    state_dtype = np.int32 if encoder.num_states < 2 ** 31 else np.int64
+    q_dtype = agent_kwargs.pop('q_dtype', np.float64) if resume is None else resume.q_table.dtype
+    snapshot = SharedQTable(encoder.num_states, action_size, q_dtype)
+    base = 0
+    if resume is not None:
+        snapshot.values[...] = resume.q_table.values
+        base = resume.episodes_trained
+    version_shm, version = shared_array((1,), np.int64)
+    episodes_shm, episodes_done = shared_array((actors,), np.int64)
+    blocked_shm, blocked = shared_array((actors,), np.float64)
+    queue = mp.Queue(maxsize=queue_size)
+
+    seeds = np.random.SeedSequence(seed if base == 0 else [seed, base]).spawn(actors + 1)
+    agent = GameAgent(state_size, action_size, q_table=qt.DenseQTable(encoder.num_states, action_size, snapshot.dtype), replay_buffer_size=replay_buffer_size, batch_size=batch_size, seed=seeds[-1], **agent_kwargs)
+    agent.q_table.values[...] = snapshot.values
+    if agent.visits is not None and resume is not None and resume.visits is not None:
+        agent.visits.values[...] = resume.visits.values
+    agent.episodes_trained = base
+    next_checkpoint = (base // checkpoint_interval + 1) * checkpoint_interval
+    processes = []
+    try:
+        for actor_id in range(actors):
+            actor_episodes = episodes // actors + (1 if actor_id < episodes % actors else 0)
+            processes.append(mp.Process(target=run_actor, args=(actor_id, seeds[actor_id], snapshot, queue, version, episodes_done, base, blocked, make_env, state_size, action_size, actor_episodes, chunk_size, state_dtype, agent_kwargs)))
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+
+        received = sampled = updates = dropped = finished = 0
+        idle = 0.0
+        touched = []
+        next_report = start + report_interval
+        while finished < actors or sampled < update_to_data * received:
+            # new data is only taken once the update budget is spent, so a slow learner
+            # leaves chunks in the queue and the actors block on it
+            if sampled >= update_to_data * received:
+                wait = time.perf_counter()
+                try:
+                    chunk = queue.get(timeout=0.1)
+                except queue_module.Empty:
+                    chunk = False
+                    if not any(process.is_alive() for process in processes):
+                        raise RuntimeError("actor processes exited without finishing")
+                idle += time.perf_counter() - wait
+                if chunk is None:
+                    finished += 1
+                elif chunk is not False:
+                    chunk_version, states, actions, rewards, next_states, dones = chunk
+                    if max_staleness is not None and updates - chunk_version > max_staleness:
+                        dropped += len(states)
+                    else:
+                        agent.replay_buffer.add_batch(states, actions, rewards, next_states, dones)
+                        received += len(states)
+
+            if sampled < update_to_data * received:
+                batch = agent.replay_buffer.sample_batch(batch_size)
+                agent.update_q_network(batch)
+                touched.append(batch[0])
+                sampled += len(batch[0])
+                updates += 1
+                if updates % publish_interval == 0:
+                    publish(agent.q_table, snapshot, touched)
+                    touched = []
+                    version[0] = updates
+
+            if checkpoint_dir is not None and base + episodes_done.sum() >= next_checkpoint:
+                agent.episodes_trained = base + int(episodes_done.sum())
+                agent.save_checkpoint(checkpoint_dir)
+                next_checkpoint = (agent.episodes_trained // checkpoint_interval + 1) * checkpoint_interval
+
+            now = time.perf_counter()
+            if now >= next_report:
+                next_report = now + report_interval
+                print(f"Actors: {actors}, Episodes: {episodes_done.sum()}, Transitions: {received}, Updates: {updates}, "
+                      f"{received / (now - start):.0f} steps/sec, actors blocked {blocked.sum():.1f}s, learner idle {idle:.1f}s, stale dropped {dropped}")
+        publish(agent.q_table, snapshot, touched)
+        version[0] = updates
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        print(f"Finished {episodes_done.sum()} episodes ({received} transitions, {dropped} dropped as stale) in {elapsed:.1f}s: "
+              f"{received / elapsed:.0f} steps/sec, {updates} updates ({updates / elapsed:.1f}/sec), actors blocked {blocked.sum():.1f}s, learner idle {idle:.1f}s")
+        agent.episodes_trained = base + int(episodes_done.sum())
+        return agent
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        queue.close()
+        snapshot.close(unlink=True)
+        del version, episodes_done, blocked
+        for shm in (version_shm, episodes_shm, blocked_shm):
+            shm.close()
+            shm.unlink()
+
+def publish(q_table, snapshot, touched):
+    # only rows updated since the last snapshot are copied, actors may read a row mid-copy
+    if not touched:
+        return
+    keys = np.unique(np.concatenate(touched))
+    snapshot.values[keys] = q_table.values[keys]
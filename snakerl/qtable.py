@@ -0,0 +1,193 @@
+import sys
+import numpy as np
+
+class StateEncoder:
+    def __init__(self, state_size):
+        # mixed radix key: each state component is one digit with its own base
+        self.state_size = tuple(state_size)
+        self.radices = np.array(self.state_size, dtype=np.int64)
+        self.strides = np.ones(len(self.state_size), dtype=np.int64)
+        for i in range(len(self.state_size) - 2, -1, -1):
+            self.strides[i] = self.strides[i + 1] * self.state_size[i + 1]
+        self.num_states = int(np.prod(self.radices))
+
+    def encode(self, state):
+        # values are taken modulo their base, so -1 maps to the same slot as in the dense array
+        key = 0
+        for value, radix in zip(state, self.state_size):
+            key = key * radix + int(value) % radix
+        return key
+
+    def encode_batch(self, states):
+        states = np.asarray(states, dtype=np.int64)
+        return (states % self.radices) @ self.strides
+
+    def decode(self, key):
+        return tuple(int(key // stride % radix) for stride, radix in zip(self.strides, self.state_size))
+
+class DenseQTable:
+    def __init__(self, num_states, action_size, dtype=np.float64, values=None, block_size=4096):
+        self.action_size = action_size
+        if values is None:
+            values = np.zeros((num_states, action_size), dtype=dtype)
+        self.values = values
+        self.dtype = values.dtype
+        # blocks of rows changed since the last checkpoint
+        self.block_size = block_size
+        self.dirty_blocks = np.ones(-(-num_states // block_size), dtype=bool)
+        # the checkpoint file these rows were last saved to or loaded from, and the blocks where the
+        # checkpoint's other file lags behind that save (None when unknown), see checkpoint.save_dense
+        self.saved_path = None
+        self.previous_dirty = None
+
+    def get(self, key):
+        return self.values[key]
+
+    def get_batch(self, keys):
+        return self.values[keys]
+
+    def add_batch(self, keys, actions, deltas):
+        np.add.at(self.values, (keys, actions), deltas)
+        self.dirty_blocks[keys // self.block_size] = True
+
+    def nbytes(self):
+        return self.values.nbytes
+
+    def occupancy(self):
+        return int(np.count_nonzero(self.values.any(axis=1)))
+
+class SparseQTable:
+    def __init__(self, action_size, dtype=np.float64):
+        self.action_size = action_size
+        self.dtype = dtype
+        self.rows = {}
+        self.empty_row = np.zeros(action_size, dtype=dtype)
+
+    def get(self, key):
+        return self.rows.get(key, self.empty_row)
+
+    def get_batch(self, keys):
+        if len(keys) == 0:
+            return np.zeros((0, self.action_size), dtype=self.dtype)
+        return np.array([self.rows.get(key, self.empty_row) for key in keys.tolist()])
+
+    def add_batch(self, keys, actions, deltas):
+        for key, action, delta in zip(keys.tolist(), actions.tolist(), deltas.tolist()):
+            row = self.rows.get(key)
+            if row is None:
+                row = self.rows[key] = np.zeros(self.action_size, dtype=self.dtype)
+            row[action] += delta
+
+    def items(self):
+        keys = np.fromiter(self.rows.keys(), dtype=np.int64, count=len(self.rows))
+        values = np.array(list(self.rows.values()), dtype=self.dtype).reshape(len(self.rows), self.action_size)
+        return keys, values
+
+    def load_items(self, keys, values):
+        for key, row in zip(keys.tolist(), values):
+            self.rows[key] = np.array(row, dtype=self.dtype)
+
+    def nbytes(self):
+        row_bytes = sys.getsizeof(self.empty_row) + sys.getsizeof(0)
+        return sys.getsizeof(self.rows) + len(self.rows) * row_bytes
+
+    def occupancy(self):
+        return len(self.rows)
+
+class HashQTable:
+    def __init__(self, action_size, capacity=1024, dtype=np.float32, max_load=0.5):
+        # open addressing with linear probing, key -1 marks an empty slot
+        self.action_size = action_size
+        self.dtype = dtype
+        self.max_load = max_load
+        self.count = 0
+        self.allocate(1 << max(int(capacity - 1).bit_length(), 4))
+
+    def allocate(self, capacity):
+        self.capacity = capacity
+        self.shift = np.uint64(64 - (capacity.bit_length() - 1))
+        self.keys = np.full(capacity, -1, dtype=np.int64)
+        self.values = np.zeros((capacity, self.action_size), dtype=self.dtype)
+
+    def hash(self, keys):
+        # fibonacci hashing, the top bits of the product pick the slot
+        return ((keys.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> self.shift).astype(np.int64)
+
+    def find_slots(self, keys):
+        # slot holding each key, or the empty slot where it would be inserted
+        mask = self.capacity - 1
+        slots = self.hash(keys)
+        pending = np.arange(len(keys))
+        while len(pending) > 0:
+            stored = self.keys[slots[pending]]
+            pending = pending[(stored != keys[pending]) & (stored != -1)]
+            slots[pending] = (slots[pending] + 1) & mask
+        return slots
+
+    def grow(self, capacity):
+        used = self.keys != -1
+        old_keys, old_values = self.keys[used], self.values[used]
+        self.allocate(capacity)
+        self.count = 0
+        self.load_items(old_keys, old_values)
+
+    def insert(self, keys):
+        keys = np.unique(keys)
+        while len(keys) > 0:
+            if (self.count + len(keys)) > self.max_load * self.capacity:
+                self.grow(self.capacity * 2)
+            slots = self.find_slots(keys)
+            new = self.keys[slots] == -1
+            keys, slots = keys[new], slots[new]
+            # every empty slot goes to one key, the others probe again next round
+            claimed, first = np.unique(slots, return_index=True)
+            self.keys[claimed] = keys[first]
+            self.count += len(claimed)
+            keys = np.delete(keys, first)
+
+    def get(self, key):
+        return self.get_batch(np.array([key], dtype=np.int64))[0]
+
+    def get_batch(self, keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        slots = self.find_slots(keys)
+        found = self.keys[slots] == keys
+        rows = np.zeros((len(keys), self.action_size), dtype=self.dtype)
+        rows[found] = self.values[slots[found]]
+        return rows
+
+    def add_batch(self, keys, actions, deltas):
+        keys = np.asarray(keys, dtype=np.int64)
+        self.insert(keys)
+        np.add.at(self.values, (self.find_slots(keys), actions), deltas)
+
+    def items(self):
+        used = self.keys != -1
+        return self.keys[used], self.values[used]
+
+    def load_items(self, keys, values):
+        keys = np.asarray(keys, dtype=np.int64)
+        self.insert(keys)
+        self.values[self.find_slots(keys)] = values
+
+    def nbytes(self):
+        return self.keys.nbytes + self.values.nbytes
+
+    def occupancy(self):
+        return self.count
+
+def backend_of(q_table):
+    if isinstance(q_table, DenseQTable):
+        return 'dense'
+    if isinstance(q_table, SparseQTable):
+        return 'sparse'
+    return 'hash'
+
+def make_q_table(backend, num_states, action_size, dtype=np.float64):
+    if backend == 'dense':
+        return DenseQTable(num_states, action_size, dtype)
+    if backend == 'sparse':
+        return SparseQTable(action_size, dtype)
+    if backend == 'hash':
+        return HashQTable(action_size, dtype=dtype)
+    raise ValueError(f"Unknown Q-table backend: {backend}")
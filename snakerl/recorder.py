@@ -0,0 +1,152 @@
+import os
+import zlib
+import struct
+import argparse
+from array import array
+import numpy as np
+from .env import SnakeEnv
+from .food import ScheduledFood
+
+# file layout: FILE_HEADER once, then one record per episode made of EPISODE_HEADER and a payload of
+# actions (uint8 per step), rewards (int16 per step) and food cells (two uint8 per food), the payload
+# optionally zlib compressed. Records are only ever appended, a torn last record is ignored on read.
+# seed is the run seed the env and agent streams were spawned from (train.main's config['seed']), so a
+# log appended to by several runs keeps them apart. Replay itself needs only the recorded foods.
+FILE_HEADER = b'SNAKELOG\x01\x00\x00\x00\x00\x00\x00\x00'
+EPISODE_HEADER = struct.Struct('<4sBBHIIIQ')  # magic, flags, reserved, grid_size, steps, foods, payload bytes, seed
+EPISODE_MAGIC = b'EPIS'
+FLAG_ZLIB = 1
+
+class Episode:
+    def __init__(self, grid_size, seed, actions, rewards, foods):
+        self.grid_size = grid_size
+        self.seed = seed
+        self.actions = actions
+        self.rewards = rewards
+        self.foods = foods
+
+class EpisodeRecorder:
+    def __init__(self, path, compress=False, seed=0):
+        self.path = path
+        self.compress = compress
+        self.seed = seed
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'ab', buffering=1 << 20)
+        if new_file:
+            self.file.write(FILE_HEADER)
+        self.actions = array('B')
+        self.rewards = array('h')
+        self.foods = array('B')
+
+    def start_episode(self, game):
+        self.grid_size = game.grid_size
+        del self.actions[:], self.rewards[:], self.foods[:]
+        self.last_food = self.add_food(game.food_position)
+
+    def add_food(self, food_position):
+        if food_position is not None:
+            food = (int(food_position[0]), int(food_position[1]))
+            self.foods.extend(food)
+            return food
+        return None
+
+    def record_step(self, action, reward, game, done):
+        self.actions.append(action)
+        self.rewards.append(reward)
+        # the food placed by game_over already belongs to the next episode
+        if not done and game.food_position is not None and tuple(game.food_position) != self.last_food:
+            self.last_food = self.add_food(game.food_position)
+
+    def end_episode(self):
+        payload = self.actions.tobytes() + self.rewards.tobytes() + self.foods.tobytes()
+        flags = 0
+        if self.compress:
+            payload = zlib.compress(payload, 1)
+            flags |= FLAG_ZLIB
+        header = EPISODE_HEADER.pack(EPISODE_MAGIC, flags, 0, self.grid_size, len(self.actions), len(self.foods) // 2, len(payload), self.seed)
+        self.file.write(header + payload)
+
+    def close(self):
+        self.file.close()
+
+def read_episodes(path):
+    with open(path, 'rb') as f:
+        if f.read(len(FILE_HEADER)) != FILE_HEADER:
+            raise ValueError(f"{path} is not a snake episode log")
+        while True:
+            header = f.read(EPISODE_HEADER.size)
+            if len(header) < EPISODE_HEADER.size:
+                return
+            magic, flags, _, grid_size, steps, foods, payload_size, seed = EPISODE_HEADER.unpack(header)
+            if magic != EPISODE_MAGIC:
+                raise ValueError(f"{path} has a corrupt episode record")
+            payload = f.read(payload_size)
+            if len(payload) < payload_size:
+                return
+            if flags & FLAG_ZLIB:
+                payload = zlib.decompress(payload)
+            actions = np.frombuffer(payload, dtype=np.uint8, count=steps)
+            rewards = np.frombuffer(payload, dtype='<i2', count=steps, offset=steps)
+            food_cells = np.frombuffer(payload, dtype=np.uint8, count=2 * foods, offset=3 * steps).reshape(foods, 2)
+            yield Episode(grid_size, seed, actions, rewards, [tuple(int(c) for c in food) for food in food_cells])
+
+def read_episode(path, index):
+    for i, episode in enumerate(read_episodes(path)):
+        if i == index:
+            return episode
+    raise IndexError(f"{path} has no episode {index}")
+
+def replay_episode(episode, agent=None, viewer_factory=None, rewards=None):
+    # re-simulates the episode, optionally rendering it and collecting transitions for offline training.
+    # the recorded foods come back in order as a schedule, rewards must match the ones used when recording
+    actions = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+    game = SnakeEnv(episode.grid_size, food=ScheduledFood(episode.foods), rewards=rewards)
+    viewer = viewer_factory(game) if viewer_factory is not None else None
+    transitions = []
+    state = agent.get_state(game) if agent is not None else None
+    for step, (action, recorded_reward) in enumerate(zip(episode.actions, episode.rewards)):
+        if viewer is not None:
+            if not viewer.handle_events():
+                break
+            viewer.render()
+        reward = game.move_snake(actions[action])
+        if reward != recorded_reward:
+            raise ValueError(f"replay diverged at step {step}: reward {reward}, recorded {recorded_reward}")
+        if agent is not None:
+            next_state = agent.get_state(game)
+            transitions.append((state, action, reward, next_state, not game.running))
+            state = next_state
+    if viewer is not None:
+        viewer.close()
+    return transitions
+
+def load_transitions(path, agent, rewards=None):
+    # every recorded step as replay buffer columns, ready for agent.replay_buffer.add_batch
+    transitions = []
+    for episode in read_episodes(path):
+        transitions.extend(replay_episode(episode, agent, rewards=rewards))
+    states, actions, rewards, next_states, dones = zip(*transitions)
+    return np.array(states), np.array(actions), np.array(rewards), np.array(next_states), np.array(dones)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and replay recorded episodes")
+    parser.add_argument('path')
+    parser.add_argument('--play', type=int, help="render this episode in a pygame window")
+    parser.add_argument('--cell-size', type=int, default=20)
+    parser.add_argument('--fps', type=int, default=10)
+    parser.add_argument('--config', default='random', help="training config the episodes were recorded with, for its rewards")
+    args = parser.parse_args()
+
+    if args.play is not None:
+        from .viewer import SnakeVisual
+        from .configs import get_config
+        episode = read_episode(args.path, args.play)
+        rewards = get_config(args.config)['rewards']
+        replay_episode(episode, viewer_factory=lambda game: SnakeVisual(game, cell_size=args.cell_size, fps=args.fps), rewards=rewards)
+    else:
+        count = steps = score = 0
+        for episode in read_episodes(args.path):
+            count += 1
+            steps += len(episode.actions)
+            score += len(episode.foods) - 1
+        print(f"{count} episodes, {steps} steps, {score} foods eaten")
@@ -0,0 +1,46 @@
+import sys
+import hashlib
+import argparse
+import numpy as np
+from . import qtable as qt
+from .env import SnakeEnv
+from .vecenv import VecSnakeEnv
+from .agent import GameAgent
+from .features import state_size_for
+
+# usage: python -m snakerl.reproducibility [--seed 0] [--episodes 500] [--backend dense|sparse|hash]
+# trains twice from the same seed and fails unless both Q-tables are bit-identical
+
+def train_once(seed, grid_size, episodes, vectorized_steps, q_backend):
+    # independent streams for the env, the agent and the vectorized env, all derived from one seed
+    env_seed, agent_seed, vec_seed = np.random.SeedSequence(seed).spawn(3)
+    state_size = state_size_for(grid_size)
+    agent = GameAgent(state_size, 4, alpha=0.15, gamma=0.8, epsilon=0.2, q_backend=q_backend, seed=agent_seed)
+    agent.train(SnakeEnv(grid_size=grid_size, seed=env_seed), episodes)
+    if vectorized_steps > 0:
+        agent.train_vectorized(VecSnakeEnv(64, grid_size=grid_size, seed=vec_seed), vectorized_steps)
+    return agent
+
+def q_table_digest(q_table):
+    if isinstance(q_table, qt.DenseQTable):
+        return hashlib.sha256(np.ascontiguousarray(q_table.values).tobytes()).hexdigest()
+    keys, values = q_table.items()
+    order = np.argsort(keys)
+    return hashlib.sha256(keys[order].tobytes() + np.ascontiguousarray(values[order]).tobytes()).hexdigest()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that training is reproducible from a seed")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--grid-size', type=int, default=10)
+    parser.add_argument('--episodes', type=int, default=500)
+    parser.add_argument('--vectorized-steps', type=int, default=200)
+    parser.add_argument('--backend', choices=('dense', 'sparse', 'hash'), default='dense')
+    args = parser.parse_args()
+
+    digests = [q_table_digest(train_once(args.seed, args.grid_size, args.episodes, args.vectorized_steps, args.backend).q_table) for _ in range(2)]
+    print(f"Run 1: {digests[0]}")
+    print(f"Run 2: {digests[1]}")
+    if digests[0] != digests[1]:
+        print("Q-tables differ, training is not reproducible")
+        sys.exit(1)
+    print("Q-tables are bit-identical")
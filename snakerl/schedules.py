@@ -0,0 +1,67 @@
+import numpy as np
+
+# epsilon schedules give the exploration rate for an episode number, GameAgent.train applies them
+# at the start of every episode. Learning rates give the merged step for a state-action pair updated
+# `counts` times in one batch after `visits` earlier updates, see GameAgent.update_q_batch.
+
+class ConstantSchedule:
+    def __init__(self, value):
+        self.constant = value
+
+    def value(self, episode):
+        return self.constant
+
+class LinearSchedule:
+    # from start to end over `episodes`, then flat
+    def __init__(self, start, end, episodes):
+        self.start = start
+        self.end = end
+        self.episodes = episodes
+
+    def value(self, episode):
+        fraction = min(episode / self.episodes, 1.0) if self.episodes > 0 else 1.0
+        return self.start + fraction * (self.end - self.start)
+
+class ExponentialSchedule:
+    # start * decay^episode, never below end
+    def __init__(self, start, end, decay):
+        self.start = start
+        self.end = end
+        self.decay = decay
+
+    def value(self, episode):
+        return max(self.end, self.start * self.decay ** episode)
+
+class ConstantRate:
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.uses_visits = False
+
+    def step(self, visits, counts):
+        return 1 - (1 - self.alpha) ** counts
+
+class VisitRate:
+    # the n-th update of a state-action pair uses max(min_alpha, alpha / n^power), so rarely seen
+    # pairs move fast and well known ones settle. Counts saturate at max_count (uint16 counters).
+    def __init__(self, alpha=1.0, min_alpha=0.01, power=0.75, max_count=65535):
+        self.alpha = alpha
+        self.min_alpha = min_alpha
+        self.power = power
+        self.max_count = max_count
+        self.uses_visits = True
+        rates = np.maximum(min_alpha, alpha / np.arange(1, max_count + 1, dtype=np.float64) ** power)
+        # log of the fraction of the old value kept after updates 1..n, a rate of 1 keeps (almost) nothing
+        log_keep = np.log1p(-np.minimum(rates, 1 - 1e-12))
+        self.cumulative_keep = np.concatenate(([0.0], np.cumsum(log_keep)))
+        self.saturated_keep = log_keep[-1]
+
+    def rate(self, visits):
+        return np.maximum(self.min_alpha, self.alpha / (np.asarray(visits, dtype=np.float64) + 1) ** self.power)
+
+    def step(self, visits, counts):
+        # exact combined step of updates visits+1 .. visits+counts applied one after another
+        visits = np.minimum(visits, self.max_count)
+        end = visits + counts
+        capped = np.minimum(end, self.max_count)
+        log_keep = self.cumulative_keep[capped] - self.cumulative_keep[visits] + (end - capped) * self.saturated_keep
+        return 1 - np.exp(log_keep)
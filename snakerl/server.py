@@ -0,0 +1,336 @@
+import os
+import json
+import time
+import socket
+import struct
+import asyncio
+import argparse
+from collections import deque
+import numpy as np
+from . import qtable as qt
+from .evaluate import load_agent
+
+# usage: python -m snakerl.server checkpoints/random [--unix /tmp/snakerl.sock | --host 127.0.0.1 --port 7878]
+#        python -m snakerl.server --connect /tmp/snakerl.sock --bench 10000 [--batch 64]
+# serves greedy actions for Q-table keys (see features.StateExtractor) to other processes from one
+# in-memory copy of the table. Every message is a header (op or status byte, uint32 count)
+# followed by count items: int64 keys for ACT and QVALUES, none for STATS and RELOAD. RELOAD only ever
+# rereads the path the server was started with, clients cannot point it at other files. Replies carry
+# uint8 actions, float32 rows of action values, or utf-8 JSON for STATS/RELOAD and errors.
+
+HEADER = struct.Struct('<BI')
+ACT, QVALUES, STATS, RELOAD = 0, 1, 2, 3
+OK, ERROR = 0, 1
+# keys per request, larger requests are refused before their payload is read
+MAX_BATCH = 1 << 20
+
+class Policy:
+    # one loaded table, requests hold on to the Policy they started with while a reload swaps in the next
+    def __init__(self, path, version, attempts=3):
+        # the table is copied out of the file rather than memory-mapped, checkpoint saves rewrite the
+        # changed blocks of the table files in place. A save that lands during the copy means copying again
+        for attempt in range(attempts):
+            before = file_times(path)
+            agent = load_agent(path)
+            if isinstance(agent.q_table, qt.DenseQTable):
+                agent.q_table.values = np.array(agent.q_table.values)
+            if file_times(path) == before:
+                break
+        else:
+            raise ValueError(f"{path} kept changing while it was loaded")
+        self.path = path
+        self.version = version
+        self.q_table = agent.q_table
+        self.num_states = agent.encoder.num_states
+        self.action_size = agent.action_size
+        self.grid_size = agent.state_size[2]
+        # meta.json's time, which the watcher compares
+        self.mtime = before[0]
+
+    def q_values(self, keys):
+        return np.asarray(self.q_table.get_batch(keys), dtype=np.float32)
+
+    def actions(self, keys):
+        return np.argmax(self.q_table.get_batch(keys), axis=1).astype(np.uint8)
+
+def modified_time(path):
+    # a checkpoint's meta.json is replaced last, so it changes once the whole save is on disk
+    if os.path.isdir(path):
+        path = os.path.join(path, 'meta.json')
+    return os.stat(path).st_mtime_ns
+
+def file_times(path):
+    # modification times of meta.json and every table file, any write to the checkpoint changes one
+    if not os.path.isdir(path):
+        return (os.stat(path).st_mtime_ns,)
+    names = ['meta.json'] + sorted(name for name in os.listdir(path) if name.endswith('.npy') or name.endswith('.npz'))
+    return tuple(os.stat(os.path.join(path, name)).st_mtime_ns for name in names)
+
+class LatencyStats:
+    # latencies of the last `window` requests, counters since start and since the last report
+    def __init__(self, window=100000):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.states = 0
+        self.start = time.perf_counter()
+        self.interval_start = self.start
+        self.interval_requests = 0
+        self.interval_states = 0
+
+    def record(self, seconds, states):
+        self.latencies.append(seconds)
+        self.requests += 1
+        self.states += states
+        self.interval_requests += 1
+        self.interval_states += states
+
+    def summary(self):
+        now = time.perf_counter()
+        elapsed = max(now - self.interval_start, 1e-9)
+        latencies = np.array(self.latencies) * 1e6
+        return {
+            'requests': self.requests,
+            'states': self.states,
+            'p50_us': float(np.percentile(latencies, 50)) if len(latencies) > 0 else 0.0,
+            'p99_us': float(np.percentile(latencies, 99)) if len(latencies) > 0 else 0.0,
+            'requests_per_sec': self.interval_requests / elapsed,
+            'states_per_sec': self.interval_states / elapsed,
+            'uptime_sec': now - self.start,
+        }
+
+    def reset_interval(self):
+        self.interval_start = time.perf_counter()
+        self.interval_requests = 0
+        self.interval_states = 0
+
+class PolicyServer:
+    def __init__(self, path, watch_interval=1.0, report_interval=10.0, window=100000):
+        self.policy = Policy(path, 1)
+        self.stats = LatencyStats(window)
+        self.watch_interval = watch_interval
+        self.report_interval = report_interval
+        self.reload_lock = None
+
+    async def reload(self):
+        # the new table loads in a thread, the swap itself is one assignment on the event loop,
+        # so in-flight requests finish on the old table and no request is ever refused
+        async with self.reload_lock:
+            policy = await asyncio.get_running_loop().run_in_executor(None, Policy, self.policy.path, self.policy.version + 1)
+            self.policy = policy
+        print(f"Serving {policy.path} (version {policy.version}, {policy.num_states} states)")
+        return policy
+
+    def reply_json(self, writer, status, value):
+        data = json.dumps(value).encode()
+        writer.write(HEADER.pack(status, len(data)) + data)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    op, count = HEADER.unpack(await reader.readexactly(HEADER.size))
+                except asyncio.IncompleteReadError:
+                    break
+                if op in (ACT, QVALUES):
+                    if count > MAX_BATCH:
+                        self.reply_json(writer, ERROR, {'error': f"batch of {count} keys is over the limit of {MAX_BATCH}"})
+                        break
+                    payload = await reader.readexactly(count * 8)
+                    start = time.perf_counter()
+                    policy = self.policy
+                    keys = np.frombuffer(payload, dtype='<i8')
+                    if count > 0 and (keys.min() < 0 or keys.max() >= policy.num_states):
+                        self.reply_json(writer, ERROR, {'error': f"keys must be in [0, {policy.num_states})"})
+                    elif op == ACT:
+                        writer.write(HEADER.pack(OK, count) + policy.actions(keys).tobytes())
+                    else:
+                        writer.write(HEADER.pack(OK, count) + policy.q_values(keys).astype('<f4').tobytes())
+                    await writer.drain()
+                    self.stats.record(time.perf_counter() - start, count)
+                elif op == STATS:
+                    policy = self.policy
+                    self.reply_json(writer, OK, dict(self.stats.summary(), path=policy.path, version=policy.version,
+                                                     num_states=policy.num_states, action_size=policy.action_size, grid_size=policy.grid_size))
+                    await writer.drain()
+                elif op == RELOAD:
+                    if count > 0:
+                        self.reply_json(writer, ERROR, {'error': "RELOAD takes no payload, it rereads the served path"})
+                        break
+                    try:
+                        policy = await self.reload()
+                    except (OSError, ValueError, KeyError) as error:
+                        self.reply_json(writer, ERROR, {'error': str(error)})
+                    else:
+                        self.reply_json(writer, OK, {'path': policy.path, 'version': policy.version})
+                    await writer.drain()
+                else:
+                    self.reply_json(writer, ERROR, {'error': f"unknown op {op}"})
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def watch(self):
+        # picks up new saves of the served table or checkpoint, e.g. from a run that is still training
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            try:
+                changed = modified_time(self.policy.path) != self.policy.mtime
+            except OSError:
+                continue
+            if changed:
+                try:
+                    await self.reload()
+                except (OSError, ValueError, KeyError) as error:
+                    print(f"Reload of {self.policy.path} failed, still serving version {self.policy.version}: {error}")
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            stats = self.stats.summary()
+            self.stats.reset_interval()
+            print(f"Requests: {stats['requests']}, {stats['requests_per_sec']:.0f} requests/sec, {stats['states_per_sec']:.0f} states/sec, "
+                  f"p50 {stats['p50_us']:.0f}us, p99 {stats['p99_us']:.0f}us", flush=True)
+
+    async def serve(self, unix=None, host='127.0.0.1', port=7878):
+        self.reload_lock = asyncio.Lock()
+        if unix is not None:
+            if os.path.exists(unix):
+                os.unlink(unix)
+            server = await asyncio.start_unix_server(self.handle, path=unix)
+            address = unix
+        else:
+            server = await asyncio.start_server(self.handle, host=host, port=port)
+            address = f"{host}:{port}"
+        print(f"Serving {self.policy.path} (version {self.policy.version}, {self.policy.num_states} states) on {address}")
+        tasks = []
+        if self.watch_interval:
+            tasks.append(asyncio.create_task(self.watch()))
+        if self.report_interval:
+            tasks.append(asyncio.create_task(self.report()))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+class PolicyClient:
+    # blocking client for worker processes, address is a unix socket path or a (host, port) pair
+    def __init__(self, address):
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.connect(address)
+        self.action_size = None
+
+    def receive(self, size):
+        data = bytearray(size)
+        view = memoryview(data)
+        while size > 0:
+            received = self.sock.recv_into(view, size)
+            if received == 0:
+                raise ConnectionError("policy server closed the connection")
+            view = view[received:]
+            size -= received
+        return data
+
+    def request(self, op, count, payload=b''):
+        self.sock.sendall(HEADER.pack(op, count) + payload)
+        status, count = HEADER.unpack(self.receive(HEADER.size))
+        return status, count
+
+    def error(self, count):
+        return RuntimeError(json.loads(self.receive(count))['error'])
+
+    def actions(self, keys):
+        keys = np.ascontiguousarray(keys, dtype='<i8')
+        status, count = self.request(ACT, len(keys), keys.tobytes())
+        if status != OK:
+            raise self.error(count)
+        return np.frombuffer(self.receive(count), dtype=np.uint8)
+
+    def q_values(self, keys):
+        keys = np.ascontiguousarray(keys, dtype='<i8')
+        if self.action_size is None:
+            self.action_size = self.stats()['action_size']
+        status, count = self.request(QVALUES, len(keys), keys.tobytes())
+        if status != OK:
+            raise self.error(count)
+        return np.frombuffer(self.receive(count * self.action_size * 4), dtype='<f4').reshape(count, self.action_size)
+
+    def stats(self):
+        status, count = self.request(STATS, 0)
+        if status != OK:
+            raise self.error(count)
+        return json.loads(self.receive(count))
+
+    def reload(self):
+        status, count = self.request(RELOAD, 0)
+        if status != OK:
+            raise self.error(count)
+        return json.loads(self.receive(count))
+
+    def close(self):
+        self.sock.close()
+
+def bench(client, requests, batch_size, seed=0):
+    # round trip latency as a client sees it, keys drawn uniformly over the served table
+    num_states = client.stats()['num_states']
+    rng = np.random.default_rng(seed)
+    latencies = np.zeros(requests)
+    start = time.perf_counter()
+    for i in range(requests):
+        keys = rng.integers(0, num_states, size=batch_size)
+        t = time.perf_counter()
+        client.actions(keys)
+        latencies[i] = time.perf_counter() - t
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': requests,
+        'batch_size': batch_size,
+        'p50_us': float(np.percentile(latencies, 50) * 1e6),
+        'p99_us': float(np.percentile(latencies, 99) * 1e6),
+        'requests_per_sec': requests / elapsed,
+        'states_per_sec': requests * batch_size / elapsed,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve greedy actions from a trained Q-table over a local socket")
+    parser.add_argument('q_table', nargs='?', help="q_table.npy file or checkpoint directory to serve")
+    parser.add_argument('--unix', help="listen on this unix socket path instead of TCP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7878)
+    parser.add_argument('--watch-interval', type=float, default=1.0, help="seconds between checks for a new save to swap in, 0 disables")
+    parser.add_argument('--report-interval', type=float, default=10.0, help="seconds between latency reports, 0 disables")
+    parser.add_argument('--connect', help="run as a client against this unix socket path or host:port")
+    parser.add_argument('--bench', type=int, default=0, help="with --connect, send this many requests and report latency")
+    parser.add_argument('--batch', type=int, default=64, help="keys per benchmark request")
+    parser.add_argument('--reload', action='store_true', help="with --connect, make the server reread its table now")
+    args = parser.parse_args()
+
+    if args.connect:
+        if ':' in args.connect:
+            host, port = args.connect.rsplit(':', 1)
+            client = PolicyClient((host, int(port)))
+        else:
+            client = PolicyClient(args.connect)
+        if args.reload:
+            print(client.reload())
+        if args.bench:
+            result = bench(client, args.bench, args.batch)
+            print(f"Requests: {result['requests']} x {result['batch_size']} keys, {result['requests_per_sec']:.0f} requests/sec, "
+                  f"{result['states_per_sec']:.0f} states/sec, p50 {result['p50_us']:.0f}us, p99 {result['p99_us']:.0f}us")
+        print(client.stats())
+        client.close()
+    else:
+        if args.q_table is None:
+            parser.error("a q_table.npy file or checkpoint directory is needed to serve")
+        server = PolicyServer(args.q_table, args.watch_interval, args.report_interval)
+        try:
+            asyncio.run(server.serve(args.unix, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
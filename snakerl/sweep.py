@@ -0,0 +1,158 @@
+import os
+import time
+import random
+import argparse
+import itertools
+import multiprocessing as mp
+import numpy as np
+from . import metrics as mt
+from .configs import get_config
+from .evaluate import evaluate_vectorized, evaluate_single
+from .train import env_factory, make_agent
+
+# usage: python -m snakerl.sweep --config random --param alpha=0.05,0.1,0.15 --param gamma=0.8,0.9 [--trials 20 --param epsilon=0.05:0.3] [--output sweep.csv]
+# without --trials every combination of the listed values runs (grid search), with it that many
+# trials are drawn, a value list picks one of its values and low:high draws uniformly between them
+
+# alpha, gamma, epsilon and episodes override the config, the others are passed to the agent
+PARAMS = ('alpha', 'gamma', 'epsilon', 'episodes', 'batch_size', 'replay_buffer_size')
+AGENT_ONLY_PARAMS = ('batch_size', 'replay_buffer_size')
+INTEGER_PARAMS = ('batch_size', 'replay_buffer_size', 'episodes')
+
+def parse_param(text):
+    name, values = text.split('=', 1)
+    if name not in PARAMS:
+        raise ValueError(f"Unknown sweep parameter: {name}")
+    cast = int if name in INTEGER_PARAMS else float
+    if ':' in values:
+        low, high = values.split(':')
+        return name, (cast(low), cast(high))
+    return name, [cast(value) for value in values.split(',')]
+
+def grid_trials(space):
+    ranges = [name for name, values in space.items() if isinstance(values, tuple)]
+    if ranges:
+        raise ValueError(f"ranges need random search (--trials): {', '.join(ranges)}")
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def random_trials(space, trials, seed=0):
+    rng = random.Random(seed)
+    drawn = []
+    for _ in range(trials):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                params[name] = rng.randint(low, high) if name in INTEGER_PARAMS else rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(values)
+        drawn.append(params)
+    return drawn
+
+def should_stop(board, lock, evaluation, score, min_evaluations, min_trials):
+    # median stopping rule: after a warm-up, a trial whose rolling score is below the median of the
+    # other trials at the same evaluation stops. Scores are shared through a manager dict.
+    with lock:
+        others = board.get(evaluation, [])
+        board[evaluation] = others + [score]
+    if evaluation < min_evaluations or len(others) < min_trials:
+        return False
+    return score < np.median(others)
+
+def run_trial(trial_id, params, config_name, seed_seq, eval_interval, eval_episodes, window, min_evaluations, min_trials, board, lock):
+    start = time.perf_counter()
+    config = get_config(config_name, **{name: value for name, value in params.items() if name not in AGENT_ONLY_PARAMS})
+    agent_kwargs = {name: value for name, value in params.items() if name in AGENT_ONLY_PARAMS}
+    env_seed, agent_seed, eval_seed = seed_seq.spawn(3)
+    game = env_factory(config)(seed=env_seed)
+    agent = make_agent(config, agent_seed, **agent_kwargs)
+
+    scores = []
+    stopped = False
+    evaluation = 0
+    while agent.episodes_trained < config['episodes'] and not stopped:
+        agent.train(game, min(eval_interval, config['episodes'] - agent.episodes_trained))
+        # greedy evaluation on the same games every time, the vectorized env only places random food
+        epsilon, agent.epsilon = agent.epsilon, 0
+        if config['food'] == 'random':
+            results = evaluate_vectorized(agent, config['grid_size'], eval_episodes, 256, 1000, eval_seed)
+        else:
+            results = evaluate_single(agent, config['grid_size'], eval_episodes, 1000, eval_seed, config['food'], config['schedule_seed'], config['schedule_path'])
+        agent.epsilon = epsilon
+        scores.append(float(np.mean(results[0])))
+        evaluation += 1
+        rolling = float(np.mean(scores[-window:]))
+        stopped = agent.episodes_trained < config['episodes'] and should_stop(board, lock, evaluation, rolling, min_evaluations, min_trials)
+
+    record = {'trial': trial_id}
+    record.update(params)
+    record.update({
+        'episodes_run': agent.episodes_trained,
+        'score': float(np.mean(scores[-window:])),
+        'best_score': max(scores),
+        'stopped_early': stopped,
+        'elapsed_sec': time.perf_counter() - start,
+    })
+    return record
+
+def run_trial_args(args):
+    return run_trial(*args)
+
+def check_space(config_name, space):
+    # trials build their agents like snakerl.train, a swept value the config's schedules would override is refused
+    config = get_config(config_name)
+    if 'epsilon' in space and config['epsilon_schedule'] is not None:
+        raise ValueError(f"config {config_name} sets epsilon from its epsilon_schedule, epsilon cannot be swept")
+    if 'alpha' in space and config['learning_rate'] is not None:
+        raise ValueError(f"config {config_name} sets the step size from its learning_rate, alpha cannot be swept")
+
+def sweep(config_name, space, trials=None, processes=None, seed=0, eval_interval=250, eval_episodes=200, window=3, min_evaluations=2, min_trials=3, output=None):
+    check_space(config_name, space)
+    params_list = grid_trials(space) if trials is None else random_trials(space, trials, seed)
+    seeds = np.random.SeedSequence(seed).spawn(len(params_list))
+    processes = processes or min(len(params_list), os.cpu_count() or 1)
+    sink = mt.CsvSink(output) if output is not None else None
+    records = []
+    with mp.Manager() as manager:
+        board = manager.dict()
+        lock = manager.Lock()
+        tasks = [(trial_id, params, config_name, seeds[trial_id], eval_interval, eval_episodes, window, min_evaluations, min_trials, board, lock) for trial_id, params in enumerate(params_list)]
+        with mp.Pool(processes) as pool:
+            # one task at a time per worker, trials are long and uneven once some stop early
+            for record in pool.imap_unordered(run_trial_args, tasks, chunksize=1):
+                records.append(record)
+                if sink is not None:
+                    sink.write(record)
+                print(f"Trial {record['trial']} ({len(records)}/{len(tasks)}): Score: {record['score']:.2f}, Episodes: {record['episodes_run']}"
+                      f"{' (stopped early)' if record['stopped_early'] else ''}, {record['elapsed_sec']:.1f}s")
+    if sink is not None:
+        sink.close()
+    return sorted(records, key=lambda record: record['score'], reverse=True)
+
+def format_table(records, names):
+    columns = ['trial'] + names + ['episodes_run', 'score', 'best_score', 'stopped_early']
+    rows = [[f"{record[column]:.4g}" if isinstance(record[column], float) else str(record[column]) for column in columns] for record in records]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    lines = ['  '.join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines.extend('  '.join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep over training configs")
+    parser.add_argument('--config', default='random')
+    parser.add_argument('--param', action='append', default=[], help="name=v1,v2,... or name=low:high, for alpha, gamma, epsilon, batch_size, replay_buffer_size or episodes")
+    parser.add_argument('--trials', type=int, help="random search with this many trials instead of the full grid")
+    parser.add_argument('--processes', type=int, help="trials run at once, defaults to one per CPU")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--eval-interval', type=int, default=250, help="training episodes between greedy evaluations")
+    parser.add_argument('--eval-episodes', type=int, default=200)
+    parser.add_argument('--window', type=int, default=3, help="evaluations averaged into the rolling score")
+    parser.add_argument('--min-evaluations', type=int, default=2, help="evaluations before a trial can be stopped")
+    parser.add_argument('--min-trials', type=int, default=3, help="other trials that must have reported before stopping one")
+    parser.add_argument('--output', help="append one CSV row per trial to this file")
+    args = parser.parse_args()
+
+    space = dict(parse_param(text) for text in args.param)
+    records = sweep(args.config, space, args.trials, args.processes, args.seed, args.eval_interval, args.eval_episodes, args.window, args.min_evaluations, args.min_trials, args.output)
+    print(format_table(records, list(space)))
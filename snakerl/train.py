@@ -0,0 +1,175 @@
+import os
+import argparse
+import functools
+import numpy as np
+from . import qtable as qt
+from . import metrics as mt
+from . import checkpoint as ckpt
+from .env import SnakeEnv
+from .food import make_food
+from .agent import GameAgent
+from .mlp import MLPAgent
+from .features import state_size_for
+from .configs import CONFIGS, get_config
+
+# usage: python -m snakerl.train [random|predefined|mlp] [--mode train|render|evaluate] [--grid-size 35] [--episodes 2000] [--seed 0] [--explore]
+# pygame is only imported for --mode render, training and evaluation run headless
+
+ACTION_SIZE = 4  # ['UP', 'DOWN', 'LEFT', 'RIGHT']
+
+def make_env(grid_size, food, rewards, schedule_seed=967, schedule_path=None, seed=None):
+    return SnakeEnv(grid_size=grid_size, food=make_food(food, schedule_seed, schedule_path), rewards=rewards, seed=seed)
+
+def env_factory(config):
+    # picklable, so parallel workers can build their own games from it
+    return functools.partial(make_env, config['grid_size'], config['food'], config['rewards'], config['schedule_seed'], config['schedule_path'])
+
+def make_metrics(config, episodes=0):
+    path = config['metrics_path']
+    if path is None:
+        sink = mt.StdoutSink()
+    elif path.endswith('.csv'):
+        sink = mt.CsvSink(path)
+    else:
+        sink = mt.JsonlSink(path)
+    return mt.TrainingMetrics(sink, interval=config['metrics_interval'], episodes=episodes)
+
+def make_agent(config, seed=None, **kwargs):
+    # a new agent as the config describes it, kwargs go straight to the agent class (e.g. batch_size)
+    state_size = state_size_for(config['grid_size'])
+    if config['agent'] == 'mlp':
+        return MLPAgent(state_size, ACTION_SIZE, alpha=config['alpha'], gamma=config['gamma'], epsilon=config['epsilon'], epsilon_schedule=config['epsilon_schedule'],
+                        hidden=config['hidden'], seed=seed, **kwargs)
+    return GameAgent(state_size, ACTION_SIZE, alpha=config['alpha'], gamma=config['gamma'], epsilon=config['epsilon'], epsilon_schedule=config['epsilon_schedule'],
+                     learning_rate=config['learning_rate'], count_visits=config['count_visits'], q_backend=config['q_backend'], seed=seed, **kwargs)
+
+def main(name='random', **overrides):
+    config = get_config(name, **overrides)
+    state_size = state_size_for(config['grid_size'])
+    agent_kwargs = {'alpha': config['alpha'], 'gamma': config['gamma'], 'epsilon': config['epsilon'],
+                    'epsilon_schedule': config['epsilon_schedule'], 'learning_rate': config['learning_rate'], 'count_visits': config['count_visits']}
+    env_seed, agent_seed = np.random.SeedSequence(config['seed']).spawn(2)
+    viewer = None
+    if config['agent'] not in ('tabular', 'mlp'):
+        raise ValueError(f"Unknown agent: {config['agent']}")
+    if config['agent'] == 'mlp' and config['workers'] > 1:
+        raise ValueError("the mlp agent trains in a single process, set workers=1")
+
+    checkpoint_dir = config['checkpoint_dir']
+    resuming = os.path.exists(os.path.join(checkpoint_dir, 'meta.json'))
+
+    if config['workers'] > 1:
+        # workers only print progress, per-episode output would interleave across processes
+        unsupported = [key for key in ('metrics_path', 'record_path') if config[key] is not None] + (['render'] if config['render'] else [])
+        if unsupported:
+            raise ValueError(f"{', '.join(unsupported)} cannot be used with workers > 1, set workers=1")
+        resume = None
+        if resuming:
+            resume = GameAgent.from_checkpoint(checkpoint_dir, mmap_mode='r', restore_rng=False, replay_buffer_size=1)
+        episodes = config['episodes'] - (resume.episodes_trained if resume is not None else 0)
+        parallel_kwargs = dict(agent_kwargs, q_backend=config['q_backend'], checkpoint_dir=checkpoint_dir, resume=resume)
+        if config['parallel_mode'] == 'async':
+            from . import pipeline
+            agent = pipeline.train_async(state_size, ACTION_SIZE, env_factory(config), episodes=episodes, actors=config['workers'], seed=config['seed'],
+                                         update_to_data=config['update_to_data'], publish_interval=config['publish_interval'], max_staleness=config['max_staleness'], **parallel_kwargs)
+        else:
+            from . import parallel
+            agent = parallel.train_parallel(state_size, ACTION_SIZE, env_factory(config), episodes=episodes, workers=config['workers'], mode=config['parallel_mode'], seed=config['seed'], **parallel_kwargs)
+        agent.save_checkpoint(checkpoint_dir)
+    else:
+        game = env_factory(config)(seed=env_seed)
+        if not resuming:
+            agent = make_agent(config, agent_seed)
+        elif config['agent'] == 'mlp':
+            agent = MLPAgent.from_checkpoint(checkpoint_dir, epsilon_schedule=config['epsilon_schedule'])
+        else:
+            agent = GameAgent.from_checkpoint(checkpoint_dir, epsilon_schedule=config['epsilon_schedule'], learning_rate=config['learning_rate'], count_visits=config['count_visits'])
+        if resuming:
+            # continue the food sequence where the checkpoint left it instead of replaying it from episode 0
+            env_state = ckpt.load_rng_state(checkpoint_dir).get('env')
+            if env_state is not None:
+                game.set_rng_state(env_state)
+
+        if config['render']:
+            from .viewer import SnakeVisual
+            viewer = SnakeVisual(game, cell_size=config['cell_size'])
+
+        recorder = None
+        if config['record_path'] is not None:
+            from .recorder import EpisodeRecorder
+            recorder = EpisodeRecorder(config['record_path'], compress=True, seed=config['seed'])
+
+        metrics = make_metrics(config, agent.episodes_trained)
+        agent.train(game, episodes=config['episodes'] - agent.episodes_trained, viewer=viewer, checkpoint_dir=checkpoint_dir, metrics=metrics, recorder=recorder)
+        if agent.episodes_trained % 500 != 0:
+            # the periodic saves only land on multiples of 500, keep the tail of the run too
+            agent.save_checkpoint(checkpoint_dir, game)
+        metrics.close()
+        if recorder is not None:
+            recorder.close()
+    print(agent.q_table_report())
+    if isinstance(agent.q_table, qt.DenseQTable):
+        np.save('q_table.npy', agent.q_table.values.reshape(state_size + (ACTION_SIZE,)))
+    if viewer is not None:
+        viewer.close()
+    return agent
+
+def evaluate_config(name, episodes=None, **overrides):
+    # greedy play of the config's checkpoint, on the food the config trains with
+    from .evaluate import evaluate, format_report
+    config = get_config(name, **overrides)
+    env = 'vec' if config['food'] == 'random' else 'single'
+    report = evaluate(config['checkpoint_dir'], episodes=episodes or 1000, env=env, seed=config['seed'], food=config['food'],
+                      schedule_seed=config['schedule_seed'], schedule_path=config['schedule_path'])
+    print(format_report(report))
+    return report
+
+def watch(name, episodes=5, explore=False, max_steps=2000, **overrides):
+    # plays the config's checkpoint in a pygame window without training it, an untrained agent if there
+    # is none yet. Greedy unless explore, which acts at the epsilon the run had reached
+    from .evaluate import load_agent, evaluate_single
+    from .viewer import SnakeVisual
+    config = get_config(name, **overrides)
+    _, agent_seed = np.random.SeedSequence(config['seed']).spawn(2)
+    if os.path.exists(os.path.join(config['checkpoint_dir'], 'meta.json')):
+        agent = load_agent(config['checkpoint_dir'])
+    else:
+        agent = make_agent(config, agent_seed, replay_buffer_size=1)
+    agent.epsilon = 0.0
+    if explore:
+        schedule = config['epsilon_schedule']
+        agent.epsilon = schedule.value(agent.episodes_trained) if schedule is not None else config['epsilon']
+    # a greedy policy can circle forever, max_steps ends such games
+    scores, lengths, causes, _ = evaluate_single(agent, config['grid_size'], episodes, max_steps, config['seed'], config['food'], config['schedule_seed'], config['schedule_path'],
+                                                 viewer_factory=lambda game: SnakeVisual(game, cell_size=config['cell_size']))
+    for episode, (score, steps, cause) in enumerate(zip(scores, lengths, causes)):
+        print(f"Episode {episode + 1}: score {score}, {steps} steps, {cause}")
+    return agent
+
+def cli(name=None, argv=None):
+    # shared by python -m snakerl.train and the entry point scripts, which fix the config name
+    parser = argparse.ArgumentParser(description="Train or evaluate a snake agent")
+    if name is None:
+        parser.add_argument('config', nargs='?', default='random', choices=sorted(CONFIGS))
+    parser.add_argument('--mode', choices=('train', 'render', 'evaluate'), default='train',
+                        help="train headless, watch the saved checkpoint play in a pygame window, or evaluate it")
+    parser.add_argument('--grid-size', type=int, help="board size including the walls, a new size gets its own checkpoint")
+    parser.add_argument('--episodes', type=int, help="episodes to train up to or to evaluate, or games to render (5 by default)")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--explore', action='store_true', help="with --mode render, act at the config's epsilon instead of greedily")
+    args = parser.parse_args(argv)
+    name = name or args.config
+    overrides = {key: value for key, value in (('grid_size', args.grid_size), ('seed', args.seed)) if value is not None}
+    if args.mode == 'evaluate':
+        checkpoint_dir = get_config(name, **overrides)['checkpoint_dir']
+        if not os.path.exists(os.path.join(checkpoint_dir, 'meta.json')):
+            parser.error(f"no checkpoint in {checkpoint_dir}, train with the same --grid-size first")
+        return evaluate_config(name, args.episodes, **overrides)
+    if args.mode == 'render':
+        return watch(name, args.episodes or 5, args.explore, **overrides)
+    if args.episodes is not None:
+        overrides['episodes'] = args.episodes
+    return main(name, **overrides)
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,108 @@
+import numpy as np
+from .env import Rewards
+from .features import StateExtractor
+
+# action order matches GameAgent.actions: ['UP', 'DOWN', 'LEFT', 'RIGHT']
+ACTION_DX = np.array([0, 0, -1, 1], dtype=np.int16)
+ACTION_DY = np.array([-1, 1, 0, 0], dtype=np.int16)
+
+class VecSnakeEnv:
+    def __init__(self, num_envs, grid_size=35, rewards=None, seed=None):
+        # random food only, scheduled food stays with the single-game env
+        self.num_envs = num_envs
+        self.grid_size = grid_size
+        self.rewards = rewards if rewards is not None else Rewards()
+        self.features = StateExtractor(grid_size)
+        self.capacity = grid_size * grid_size
+        self.rng = np.random.default_rng(seed)
+
+        # occupancy[n, x, y] is True where game n has a snake segment
+        self.occupancy = np.zeros((num_envs, grid_size, grid_size), dtype=bool)
+        # ring buffer of body segments, body[n, head_ptr[n]] is the head
+        self.body = np.zeros((num_envs, self.capacity, 2), dtype=np.int16)
+        self.head_ptr = np.zeros(num_envs, dtype=np.int64)
+        self.length = np.zeros(num_envs, dtype=np.int64)
+        self.head = np.zeros((num_envs, 2), dtype=np.int64)
+        self.food = np.zeros((num_envs, 2), dtype=np.int64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        # games that ended on a wall in the last step, the other finished games hit their body
+        self.wall_hits = np.zeros(num_envs, dtype=bool)
+
+        self.reset()
+
+    def reset(self, env_ids=None):
+        if env_ids is None:
+            env_ids = np.arange(self.num_envs)
+        if len(env_ids) == 0:
+            return self.get_states()
+
+        # same start as SnakeEnv: [(5, 5), (4, 5), (3, 5)], stored tail first
+        start = np.array([(3, 5), (4, 5), (5, 5)], dtype=np.int16)
+        self.occupancy[env_ids] = False
+        self.body[env_ids, :3] = start
+        self.occupancy[env_ids[:, None], start[:, 0], start[:, 1]] = True
+        self.head_ptr[env_ids] = 2
+        self.length[env_ids] = 3
+        self.head[env_ids] = start[2]
+        self.score[env_ids] = 0
+        self.generate_food(env_ids)
+        return self.get_states()
+
+    def generate_food(self, env_ids):
+        # rejection sampling for all games at once, exact sampling for nearly full boards
+        pending = env_ids
+        for _ in range(8):
+            if len(pending) == 0:
+                return
+            xy = self.rng.integers(1, self.grid_size - 1, size=(len(pending), 2))
+            free = ~self.occupancy[pending, xy[:, 0], xy[:, 1]]
+            self.food[pending[free]] = xy[free]
+            pending = pending[~free]
+        for n in pending:
+            free_x, free_y = np.nonzero(~self.occupancy[n, 1:-1, 1:-1])
+            if len(free_x) == 0:
+                self.food[n] = -1
+                continue
+            i = self.rng.integers(len(free_x))
+            self.food[n] = (free_x[i] + 1, free_y[i] + 1)
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        idx = np.arange(self.num_envs)
+        new_x = self.head[:, 0] + ACTION_DX[actions]
+        new_y = self.head[:, 1] + ACTION_DY[actions]
+
+        # collision check, the tail still counts as body like in SnakeEnv
+        wall = (new_x <= 0) | (new_x >= self.grid_size - 1) | (new_y <= 0) | (new_y >= self.grid_size - 1)
+        body = self.occupancy[idx, np.clip(new_x, 0, self.grid_size - 1), np.clip(new_y, 0, self.grid_size - 1)]
+        dones = wall | body
+        self.wall_hits = wall
+        alive = ~dones
+        ate = alive & (new_x == self.food[:, 0]) & (new_y == self.food[:, 1])
+
+        # vacate the tail of every game that moved without eating
+        moved = np.flatnonzero(alive & ~ate)
+        tail_ptr = (self.head_ptr[moved] - self.length[moved] + 1) % self.capacity
+        tail = self.body[moved, tail_ptr]
+        self.occupancy[moved, tail[:, 0], tail[:, 1]] = False
+
+        # push the new head
+        alive_ids = np.flatnonzero(alive)
+        self.head_ptr[alive_ids] = (self.head_ptr[alive_ids] + 1) % self.capacity
+        self.head[alive_ids, 0] = new_x[alive_ids]
+        self.head[alive_ids, 1] = new_y[alive_ids]
+        self.body[alive_ids, self.head_ptr[alive_ids]] = self.head[alive_ids]
+        self.occupancy[alive_ids, new_x[alive_ids], new_y[alive_ids]] = True
+
+        ate_ids = np.flatnonzero(ate)
+        self.length[ate_ids] += 1
+        self.score[ate_ids] += 1
+        self.generate_food(ate_ids)
+
+        rewards = np.where(dones, self.rewards.death, np.where(ate, self.rewards.food, self.rewards.step))
+        self.reset(np.flatnonzero(dones))
+        return self.get_states(), rewards, dones
+
+    def get_states(self):
+        # same keys as GameAgent.get_state, one per game
+        return self.features.index_batch(self.occupancy.reshape(self.num_envs, -1), self.head, self.food)
@@ -0,0 +1,113 @@
+import pygame
+
+class SnakeVisual:
+    def __init__(self, game, cell_size=15, fps=10):
+        self.game = game
+        self.grid_size = game.grid_size
+        self.cell_size = cell_size
+        self.fps = fps
+        self.bkg_color = (161, 219, 192)
+        self.agt_color = (0, 0, 0)
+        self.grid_color = (255, 255, 255)
+        # the snake and food as of the last frame, a frame after one move only repaints the cells that move changed
+        self.drawn_snake = None
+        self.full_redraw = True
+        # the window opens on the first handle_events or render, a viewer that is never shown costs nothing
+        self.screen = None
+
+    def initialize_game(self):
+        pygame.init()
+        self.screen = pygame.display.set_mode((self.grid_size * self.cell_size, self.grid_size * self.cell_size))
+        self.clock = pygame.time.Clock()
+        self.full_redraw = True
+
+        # the walls and grid never change, so draw them once onto a cached surface
+        self.background = pygame.Surface(self.screen.get_size()).convert()
+        self.background.fill(self.bkg_color)
+        for x in range(self.grid_size):
+            for y in range(self.grid_size):
+                if x == 0 or y == 0 or x == self.grid_size - 1 or y == self.grid_size - 1:
+                    pygame.draw.rect(self.background, (0, 0, 0), (x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size))
+                else:
+                    pygame.draw.rect(self.background, self.grid_color, (x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size), 1)
+
+    def cell_rect(self, cell):
+        return pygame.Rect(int(cell[0]) * self.cell_size, int(cell[1]) * self.cell_size, self.cell_size, self.cell_size)
+
+    def remember_drawn(self):
+        snake = self.game.snake
+        self.drawn_snake = snake
+        self.drawn_head = snake[0]
+        self.drawn_tail = snake[-1]
+        self.drawn_length = len(snake)
+        self.drawn_food = self.game.food_position
+
+    def draw_environment(self):
+        self.screen.blit(self.background, (0, 0))
+        for cell in self.game.snake:
+            pygame.draw.rect(self.screen, self.agt_color, self.cell_rect(cell))
+        if self.game.food_position is not None:
+            pygame.draw.rect(self.screen, self.agt_color, self.cell_rect(self.game.food_position))
+        self.remember_drawn()
+
+    def draw_changes(self):
+        # one move changes at most the new head, the vacated tail and the old and new food cells, read
+        # off the ends of the snake deque. A restarted game (game_over builds a new deque) or more than
+        # one move since the last frame gets a full redraw
+        snake = self.game.snake
+        grew = len(snake) - self.drawn_length
+        moved = snake[0] != self.drawn_head
+        if snake is not self.drawn_snake or grew not in (0, 1) or (moved and snake[1] != self.drawn_head) or (grew and not moved):
+            self.draw_environment()
+            return [self.screen.get_rect()]
+        vacated, covered = [], []
+        if moved:
+            covered.append(snake[0])
+            if not grew:
+                vacated.append(self.drawn_tail)
+        food = self.game.food_position
+        if food != self.drawn_food:
+            if self.drawn_food is not None:
+                vacated.append(self.drawn_food)
+            if food is not None:
+                covered.append(food)
+        dirty_rects = []
+        # vacated first, the new head can sit on the eaten food and new food on the vacated tail
+        for cell in vacated:
+            rect = self.cell_rect(cell)
+            self.screen.blit(self.background, rect, rect)
+            dirty_rects.append(rect)
+        for cell in covered:
+            rect = self.cell_rect(cell)
+            pygame.draw.rect(self.screen, self.agt_color, rect)
+            dirty_rects.append(rect)
+        self.remember_drawn()
+        return dirty_rects
+
+    def handle_events(self, on_key=None):
+        if self.screen is None:
+            self.initialize_game()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.VIDEOEXPOSE:
+                self.full_redraw = True
+            elif event.type == pygame.KEYDOWN and on_key is not None:
+                on_key(event.key)
+        return True
+
+    def render(self):
+        if self.screen is None:
+            self.initialize_game()
+        if self.full_redraw:
+            self.draw_environment()
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(self.draw_changes())
+        self.clock.tick(self.fps)
+
+    def close(self):
+        if self.screen is not None:
+            pygame.quit()
+            self.screen = None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the tests import the snakerl package from the repository root, like the entry point scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from snakerl.agent import GameAgent
+from snakerl.features import state_size_for
+
+def make_agent(backend='dense', alpha=0.3):
+    return GameAgent(state_size_for(10), 4, alpha=alpha, gamma=0.9, q_backend=backend, seed=0)
+
+@pytest.mark.parametrize('backend', ['dense', 'sparse', 'hash'])
+def test_duplicate_pairs_match_sequential_updates(backend):
+    # a pair repeated k times in one batch moves like k single updates toward the same snapshot target
+    merged = make_agent(backend)
+    sequential = make_agent(backend)
+    states = np.array([5, 5, 5, 5, 5, 9], dtype=np.int64)
+    actions = np.array([1, 1, 1, 1, 1, 2])
+    rewards = np.array([10.0, 10.0, 10.0, 10.0, 10.0, -3.0])
+    next_states = np.array([7, 7, 7, 7, 7, 8], dtype=np.int64)
+    merged.update_q_batch(states, actions, rewards, next_states)
+    for i in range(len(states)):
+        sequential.update_q_batch(states[i:i + 1], actions[i:i + 1], rewards[i:i + 1], next_states[i:i + 1])
+
+    assert merged.q_table.get(5)[1] == pytest.approx((1 - 0.7 ** 5) * 10)
+    assert merged.q_table.get(5)[1] == pytest.approx(sequential.q_table.get(5)[1])
+    assert merged.q_table.get(9)[2] == pytest.approx(0.3 * -3)
+    assert merged.q_table.get(5)[0] == 0
+
+def test_large_batch_of_repeats_does_not_overshoot():
+    # summing k * alpha of the error would jump past the target once k * alpha > 1
+    agent = make_agent(alpha=0.5)
+    count = 64
+    agent.update_q_batch(np.full(count, 3, dtype=np.int64), np.zeros(count, dtype=np.int64), np.full(count, 100.0), np.full(count, 4, dtype=np.int64))
+    assert 0 < agent.q_table.get(3)[0] <= 100
+
+def test_repeats_average_their_td_errors():
+    agent = make_agent(alpha=0.25)
+    agent.update_q_batch(np.array([2, 2], dtype=np.int64), np.array([3, 3]), np.array([4.0, 8.0]), np.array([6, 6], dtype=np.int64))
+    assert agent.q_table.get(2)[3] == pytest.approx((1 - 0.75 ** 2) * 6)
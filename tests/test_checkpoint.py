@@ -0,0 +1,45 @@
+import numpy as np
+from snakerl.agent import GameAgent
+from snakerl.env import SnakeEnv
+from snakerl.features import state_size_for
+
+def trained_agent(seed, episodes=5):
+    agent = GameAgent(state_size_for(10), 4, seed=seed)
+    agent.train(SnakeEnv(10, seed=seed), episodes)
+    return agent
+
+def saved_values(path):
+    return GameAgent.from_checkpoint(str(path), restore_rng=False).q_table.values
+
+def test_save_over_another_checkpoint(tmp_path):
+    # the dirty blocks only say what changed since this table's own last save, not what differs
+    # from a table somebody else saved in the destination
+    first, second = tmp_path / 'c1', tmp_path / 'c2'
+    trained_agent(1).save_checkpoint(str(first))
+    trained_agent(2).save_checkpoint(str(second))
+    agent = GameAgent.from_checkpoint(str(first))
+    agent.train(SnakeEnv(10, seed=3), 5)
+    agent.save_checkpoint(str(second))
+    np.testing.assert_array_equal(saved_values(second), agent.q_table.values)
+
+def test_incremental_saves_keep_every_checkpoint_whole(tmp_path):
+    agent = trained_agent(4)
+    game = SnakeEnv(10, seed=4)
+    for _ in range(4):
+        agent.save_checkpoint(str(tmp_path))
+        np.testing.assert_array_equal(saved_values(tmp_path), agent.q_table.values)
+        agent.train(game, 3)
+    resumed = GameAgent.from_checkpoint(str(tmp_path))
+    for _ in range(3):
+        resumed.train(game, 3)
+        resumed.save_checkpoint(str(tmp_path))
+        np.testing.assert_array_equal(saved_values(tmp_path), resumed.q_table.values)
+
+def test_reader_keeps_its_table_through_the_next_save(tmp_path):
+    agent = trained_agent(5)
+    agent.save_checkpoint(str(tmp_path))
+    reader = GameAgent.from_checkpoint(str(tmp_path), mmap_mode='r', restore_rng=False).q_table.values
+    before = np.array(reader)
+    agent.q_table.add_batch(np.arange(0, 50000, 7), np.zeros(7143, dtype=np.int64), np.ones(7143))
+    agent.save_checkpoint(str(tmp_path))
+    np.testing.assert_array_equal(reader, before)
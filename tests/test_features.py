@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from snakerl.env import SnakeEnv
+from snakerl.vecenv import VecSnakeEnv
+from snakerl.features import StateExtractor
+
+ACTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+
+def feature_tuple(grid_size, is_occupied, head, food):
+    # the state tuple GameAgent.get_state returned before the precomputed keys, which saved tables are indexed by
+    head_x, head_y = head
+    food_x, food_y = food if food is not None else (-1, -1)
+    return (
+        int(np.sign(food_x - head_x)), int(np.sign(food_y - head_y)),
+        head_y, grid_size - 1 - head_y, head_x, grid_size - 1 - head_x,
+        int(is_occupied(head_x, head_y - 1) or head_y - 1 < 0), int(is_occupied(head_x, head_y + 1) or head_y + 1 >= grid_size),
+        int(is_occupied(head_x - 1, head_y) or head_x - 1 < 0), int(is_occupied(head_x + 1, head_y) or head_x + 1 >= grid_size),
+    )
+
+@pytest.mark.parametrize('grid_size', [8, 10, 35])
+def test_keys_match_encoded_feature_tuples(grid_size):
+    features = StateExtractor(grid_size)
+    game = SnakeEnv(grid_size, seed=grid_size)
+    rng = np.random.default_rng(grid_size)
+    for _ in range(5000):
+        expected = features.encoder.encode(feature_tuple(grid_size, game.is_occupied, game.snake[0], game.food_position))
+        assert features.index(game.occupancy, game.snake[0], game.food_position) == expected
+        occupancy = np.frombuffer(bytes(game.occupancy), dtype=np.uint8)[None]
+        food = game.food_position if game.food_position is not None else (-1, -1)
+        assert features.index_batch(occupancy, [game.snake[0]], [food])[0] == expected
+        game.move_snake(ACTIONS[rng.integers(4)])
+
+@pytest.mark.parametrize('grid_size', [8, 10, 35])
+def test_vectorized_keys_match_encoded_feature_tuples(grid_size):
+    venv = VecSnakeEnv(16, grid_size=grid_size, seed=grid_size)
+    rng = np.random.default_rng(grid_size)
+    states = venv.get_states()
+    for _ in range(500):
+        for n in range(venv.num_envs):
+            occupied = lambda x, y: 0 <= x < grid_size and 0 <= y < grid_size and bool(venv.occupancy[n, x, y])
+            food = tuple(int(c) for c in venv.food[n]) if venv.food[n, 0] >= 0 else None
+            assert states[n] == venv.features.encoder.encode(feature_tuple(grid_size, occupied, tuple(int(c) for c in venv.head[n]), food))
+        states, _, _ = venv.step(rng.integers(4, size=venv.num_envs))
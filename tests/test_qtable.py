@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from snakerl import qtable as qt
+
+@pytest.mark.parametrize('backend', ['sparse', 'hash'])
+def test_backend_matches_dense(backend):
+    num_states, action_size = 5000, 4
+    rng = np.random.default_rng(0)
+    dense = qt.make_q_table('dense', num_states, action_size)
+    other = qt.make_q_table(backend, num_states, action_size)
+    for _ in range(20):
+        # repeated keys in a batch accumulate, and the hash table grows past its initial capacity
+        keys = rng.integers(0, num_states, size=300)
+        actions = rng.integers(0, action_size, size=300)
+        deltas = rng.standard_normal(300)
+        dense.add_batch(keys, actions, deltas)
+        other.add_batch(keys, actions, deltas)
+        probe = rng.integers(0, num_states, size=500)
+        np.testing.assert_allclose(other.get_batch(probe), dense.get_batch(probe))
+    assert other.occupancy() == dense.occupancy()
+    keys, values = other.items()
+    np.testing.assert_allclose(values, dense.values[keys])
+
+def test_hash_unseen_keys_read_as_zero():
+    table = qt.HashQTable(4)
+    table.add_batch(np.array([10, 10, 99]), np.array([0, 0, 3]), np.array([1.0, 2.0, 5.0]))
+    np.testing.assert_allclose(table.get_batch(np.array([10, 99, 7])), [[3, 0, 0, 0], [0, 0, 0, 5], [0, 0, 0, 0]])
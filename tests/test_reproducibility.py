@@ -0,0 +1,19 @@
+import pytest
+from snakerl import train
+from snakerl.reproducibility import train_once, q_table_digest
+
+@pytest.mark.parametrize('backend', ['dense', 'sparse', 'hash'])
+def test_same_seed_gives_identical_tables(backend):
+    digests = [q_table_digest(train_once(3, 10, 100, 20, backend).q_table) for _ in range(2)]
+    assert digests[0] == digests[1]
+
+@pytest.mark.parametrize('name', ['random', 'predefined'])
+def test_resumed_run_matches_uninterrupted_run(name, tmp_path, monkeypatch):
+    # train.main saves q_table.npy to the working directory
+    monkeypatch.chdir(tmp_path)
+    settings = dict(metrics_interval=1000)
+    whole = train.main(name, episodes=120, checkpoint_dir=str(tmp_path / 'whole'), **settings)
+    train.main(name, episodes=60, checkpoint_dir=str(tmp_path / 'resumed'), **settings)
+    resumed = train.main(name, episodes=120, checkpoint_dir=str(tmp_path / 'resumed'), **settings)
+    assert resumed.episodes_trained == 120
+    assert q_table_digest(resumed.q_table) == q_table_digest(whole.q_table)